@@ -0,0 +1,71 @@
+"""
+Peak RSS of streaming a user's contacts through ``export_contacts``.
+
+Seeds one user with ``--contacts`` contacts, then exports them in a fresh child process and reports the child's
+peak resident set size, so that the numbers for 100 and 1M contacts can be compared directly::
+
+    python benchmarks/contacts_export.py --contacts 100
+    python benchmarks/contacts_export.py --contacts 1000000
+"""
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.models import Base, User  # noqa: E402
+from src.repository import contacts as repository_contacts  # noqa: E402
+from src.services import contacts_io  # noqa: E402
+from benchmarks.contacts_pagination import seed  # noqa: E402
+
+
+async def prepare(args):
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+        await seed(db, args.contacts)
+    await engine.dispose()
+
+
+async def export(args):
+    engine = create_async_engine(args.url)
+    async with async_sessionmaker(bind=engine, class_=AsyncSession)() as db:
+        user = await db.get(User, 1)
+        rows = repository_contacts.stream_contacts(user, db, args.batch_size)
+        started = time.perf_counter()
+        size = 0
+        async for chunk in contacts_io.export_contacts(rows, args.format, args.batch_size):
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{args.contacts} contacts, {args.format}: {size / 2 ** 20:.1f} MiB in {elapsed:.2f}s, "
+          f"peak RSS {peak_mb:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./bench_export.db")
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "jsonl", "vcard"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--export-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.export_only:
+        asyncio.run(export(args))
+        return
+    asyncio.run(prepare(args))
+    subprocess.run([sys.executable, "-m", "benchmarks.contacts_export", *sys.argv[1:], "--export-only"],
+                   cwd=Path(__file__).resolve().parent.parent, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency of ``repository_contacts.get_contacts`` across page depth, offset vs keyset pagination.
+
+Seeds one user with ``--contacts`` contacts in a scratch database and times fetching a page at increasing
+depths. Pass a PostgreSQL URL (``postgresql+asyncpg://...``) to measure against the production engine::
+
+    python benchmarks/contacts_pagination.py --contacts 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.models import Base, Contacts, User  # noqa: E402
+from src.repository import contacts as repository_contacts  # noqa: E402
+
+
+async def seed(db: AsyncSession, count: int) -> User:
+    user = User(username="bench", email="bench@example.com", password="x", confirmed=True)
+    db.add(user)
+    await db.commit()
+    batch = 10_000
+    for start in range(0, count, batch):
+        await db.execute(insert(Contacts), [
+            {"name": f"n{i:08d}", "surname": "s", "email": f"c{i}@example.com", "phone_number": "0",
+             "user_id": user.id} for i in range(start, min(start + batch, count))
+        ])
+    await db.commit()
+    return user
+
+
+async def timed(coro_factory, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def run(args):
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        user = await seed(db, args.contacts)
+        print(f"{'depth':>10} {'offset ms':>10} {'keyset ms':>10}")
+        depth = args.limit
+        while depth < args.contacts:
+            page_before = await repository_contacts.get_contacts(depth - 1, 1, user, db)
+            after = (page_before[0].id,)
+            offset = await timed(lambda: repository_contacts.get_contacts(depth, args.limit, user, db), args.repeat)
+            keyset = await timed(lambda: repository_contacts.get_contacts(0, args.limit, user, db, after=after),
+                                 args.repeat)
+            print(f"{depth:>10} {offset * 1000:>10.2f} {keyset * 1000:>10.2f}")
+            db.expunge_all()
+            depth *= 4
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./bench_pagination.db")
+    parser.add_argument("--contacts", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
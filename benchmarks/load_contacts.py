@@ -0,0 +1,68 @@
+"""
+Load benchmark for the contacts API.
+
+Runs a fixed number of concurrent clients against ``GET /api/contacts/`` of a running server and reports
+requests per second. To compare the blocking (psycopg2) and the async (asyncpg) database paths, start the
+server from each revision with the same worker count and run this script with the same arguments::
+
+    uvicorn main:app --workers 1
+    python benchmarks/load_contacts.py --email user@example.com --password secret --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/api/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def worker(client: httpx.AsyncClient, path: str, headers: dict, deadline: float, latencies: list[float],
+                 errors: list[int]):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        token = await login(client, args.email, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+        latencies: list[float] = []
+        errors: list[int] = []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(client, args.path, headers, deadline, latencies, errors)
+                               for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    count = len(latencies)
+    print(f"requests: {count}, errors: {len(errors)}, elapsed: {elapsed:.2f}s")
+    print(f"requests/s: {count / elapsed:.1f}")
+    if count:
+        print(f"p50: {latencies[count // 2] * 1000:.1f}ms, p99: {latencies[int(count * 0.99) - 1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/contacts/")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Microbenchmark of the per-request cost of the cached user in ``Auth.get_current_user``.
+
+Compares pickling a ``User`` ORM instance (the previous cache format) with the versioned ``UserSnapshot``.
+Cache misses pay one serialize, cache hits pay one deserialize::
+
+    python benchmarks/user_snapshot.py
+"""
+import pickle
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.models import User  # noqa: E402
+from src.services.cache import UserSnapshot  # noqa: E402
+
+
+def main(number: int = 100_000):
+    user = User(id=42, email="user@example.com", username="user123", password="x" * 60,
+                avatar="https://www.gravatar.com/avatar/00000000000000000000000000000000", confirmed=True,
+                created_at=datetime(2024, 1, 2, 3, 4, 5))
+    snapshot = UserSnapshot.from_user(user)
+    pickled = pickle.dumps(user)
+    dumped = snapshot.dumps()
+
+    cases = {
+        "pickle User dumps": lambda: pickle.dumps(user),
+        "pickle User loads": lambda: pickle.loads(pickled),
+        "UserSnapshot dumps": lambda: UserSnapshot.from_user(user).dumps(),
+        "UserSnapshot loads": lambda: UserSnapshot.loads(dumped),
+    }
+    print(f"payload size: pickle {len(pickled)} bytes, snapshot {len(dumped)} bytes")
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=number, repeat=5))
+        print(f"{name:<20} {seconds / number * 1e6:8.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
-import redis.asyncio as redis
 
-from src.routes import contacts, auth, users
+from src.routes import contacts, auth, users, internal
 from src.conf.config import settings
+from src.database.redis_pool import open_redis, close_redis
+from src.services.cache import token_cache, user_cache
+from src.services.metrics import RequestMetricsMiddleware
+from src.services.rate_limit import RateLimitHeadersMiddleware
+from src.services.passwords import password_hasher
 
 app = FastAPI()
 
@@ -19,20 +24,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset",
+                    "RateLimit-Policy", "Retry-After"],
 )
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(RequestMetricsMiddleware, server_timing=settings.debug)
 
 
 app.include_router(contacts.router, prefix='/api')
 app.include_router(auth.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
+app.include_router(internal.router)
 
 
 
 @app.on_event("startup")
 async def startup():
-    r = await redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
-                          decode_responses=True)
-    await FastAPILimiter.init(r)
+    await open_redis()
+    app.state.user_cache_listener = asyncio.create_task(user_cache.listen())
+    app.state.token_cache_listener = asyncio.create_task(token_cache.listen())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.user_cache_listener.cancel()
+    app.state.token_cache_listener.cancel()
+    password_hasher.shutdown()
+    await close_redis()
 
 
 @app.get("/")
@@ -0,0 +1,60 @@
+"""Contacts access path indexes
+
+Every contacts query filters by ``user_id``, but the only index leading with it was the ``(name, user_id)``
+unique constraint, in the wrong column order. Adds:
+
+* ``(user_id, id)`` for listing and keyset pagination by id, and for the other per-user filters;
+* ``(user_id, name, id)`` and ``(user_id, surname, name)`` for pagination by name and by surname;
+* ``(user_id, birthday_key)`` for upcoming birthdays, with ``birthday_key`` backfilled from ``birthday``;
+* trigram indexes on name, surname and email for substring filters and search on PostgreSQL (``pg_trgm``).
+  Exact email lookups already use the unique constraint on ``email``.
+
+On PostgreSQL the indexes are built with ``CREATE INDEX CONCURRENTLY`` so that writes are not blocked.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_contacts_user_id_id', ['user_id', 'id'], {}),
+    ('ix_contacts_user_id_name_id', ['user_id', 'name', 'id'], {}),
+    ('ix_contacts_user_id_surname_name', ['user_id', 'surname', 'name'], {}),
+    ('ix_contacts_user_id_birthday_key', ['user_id', 'birthday_key'], {}),
+    *((f'ix_contacts_{column}_trgm', [column], {'postgresql_using': 'gin', 'postgresql_ops': {column: 'gin_trgm_ops'}})
+      for column in ('name', 'surname', 'email')),
+]
+
+BIRTHDAY_KEY = {
+    'postgresql': "EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday)",
+    'sqlite': "CAST(strftime('%m', birthday) AS INTEGER) * 100 + CAST(strftime('%d', birthday) AS INTEGER)",
+}
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.add_column('contacts', sa.Column('birthday_key', sa.SmallInteger(), nullable=True))
+    op.execute(f"UPDATE contacts SET birthday_key = {BIRTHDAY_KEY[dialect]} WHERE birthday IS NOT NULL")
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with op.get_context().autocommit_block():
+            for name, columns, options in INDEXES:
+                op.create_index(name, 'contacts', columns, postgresql_concurrently=True, **options)
+    else:
+        for name, columns, options in INDEXES:
+            op.create_index(name, 'contacts', columns, **options)
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='contacts')
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_column('birthday_key')
@@ -0,0 +1,26 @@
+"""Drop users.refresh_token
+
+Refresh tokens are tracked as sessions in Redis, one per device, instead of in a column of the ``users`` row.
+Tokens stored in the column are no longer accepted, so their users log in again.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('refresh_token')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('refresh_token', sa.String(length=255), nullable=True))
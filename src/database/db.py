@@ -1,17 +1,54 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from src.conf.config import settings
+from src.database.diagnostics import QueryDiagnostics
+from src.database.pool import InstrumentedPool
+from src.services.metrics import current_request
 
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_timeout=settings.db_pool_timeout,
+)
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - context.query_started
+
+
+def instrument_engine(async_engine: AsyncEngine) -> None:
+    """
+    Counts the SQL statements of the current request and the time spent executing them.
+
+    :param async_engine: The engine to instrument.
+    :type async_engine: AsyncEngine
+    """
+    event.listen(async_engine.sync_engine, "before_cursor_execute", start_query_timer)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", record_query)
+
+
+instrument_engine(engine)
+if settings.db_diagnostics:
+    QueryDiagnostics.from_settings().attach(engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
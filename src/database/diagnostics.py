@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import settings
+from src.services.metrics import current_request
+
+
+class QueryDiagnostics:
+    """
+    Opt-in query diagnostics for development.
+
+    Statements slower than ``slow_seconds`` are printed with their parameters and the database's plan for them.
+    Within one request, a statement whose exact SQL runs ``repeat_threshold`` times is reported as a likely N+1
+    (typically a lazy-loaded relationship touched in a loop): the parameters differ, the statement does not.
+    """
+    explain_prefixes = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+    explainable = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+    savepoint = "query_diagnostics_explain"
+
+    def __init__(self, slow_seconds: float, repeat_threshold: int, explain: bool = True):
+        self.slow_seconds = slow_seconds
+        self.repeat_threshold = repeat_threshold
+        self.explain = explain
+
+    @classmethod
+    def from_settings(cls) -> "QueryDiagnostics":
+        return cls(settings.db_slow_query_seconds, settings.db_repeated_query_threshold)
+
+    def attach(self, async_engine: AsyncEngine) -> None:
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self.before_execute)
+        event.listen(async_engine.sync_engine, "after_cursor_execute", self.after_execute)
+
+    @staticmethod
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context.diagnostics_started = time.perf_counter()
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.diagnostics_started
+        if elapsed >= self.slow_seconds:
+            message = f"Slow query ({elapsed * 1000:.1f} ms): {statement} {parameters!r}"
+            plan = self.explain_plan(conn, statement, parameters) if self.explain and not executemany else None
+            print(f"{message}\n{plan}" if plan else message)
+        stats = current_request.get()
+        if stats is not None:
+            count = stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            if count == self.repeat_threshold:
+                print(f"Possible N+1 query in {stats.label}: executed {count} times: {statement}")
+
+    def explain_plan(self, conn, statement: str, parameters) -> str | None:
+        """
+        Asks the database for the plan of a statement, bypassing the engine events.
+
+        :param conn: The connection the statement ran on.
+        :param statement: The SQL statement.
+        :type statement: str
+        :param parameters: The parameters it ran with.
+        :return: The plan, one row per line, or None for dialects and statements that cannot be explained.
+        :rtype: str | None
+        """
+        prefix = self.explain_prefixes.get(conn.dialect.name)
+        if prefix is None or not statement.lstrip().upper().startswith(self.explainable):
+            return None
+        cursor = conn.connection.cursor()
+        try:
+            # A failed statement aborts the whole PostgreSQL transaction, so the EXPLAIN runs in a savepoint that
+            # is rolled back on error and the request's own transaction carries on.
+            cursor.execute(f"SAVEPOINT {self.savepoint}")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+            except conn.dialect.loaded_dbapi.Error:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {self.savepoint}")
+                raise
+            finally:
+                cursor.execute(f"RELEASE SAVEPOINT {self.savepoint}")
+        except conn.dialect.loaded_dbapi.Error as err:
+            return f"EXPLAIN failed: {err}"
+        finally:
+            cursor.close()
+
+
+@contextmanager
+def count_queries(async_engine: AsyncEngine) -> Iterator[list[str]]:
+    """
+    Collects every statement executed on an engine while the block runs.
+
+    :param async_engine: The engine to watch.
+    :type async_engine: AsyncEngine
+    :return: The list the statements are appended to.
+    :rtype: Iterator[list[str]]
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "after_cursor_execute", record)
@@ -1,15 +1,38 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, UniqueConstraint, Boolean
-from sqlalchemy.orm import relationship
+from datetime import date
+
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, DateTime, ForeignKey, UniqueConstraint, Boolean, \
+    Index, DDL, event
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
+event.listen(Base.metadata, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+
+def make_birthday_key(birthday: date | None) -> int | None:
+    """
+    Returns the year-independent ordinal of a birthday, ``month * 100 + day`` (29 February is 229).
+    """
+    return birthday.month * 100 + birthday.day if birthday else None
+
+
+def trigram_index(name: str, column: str) -> Index:
+    return Index(name, column, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
 
 
 class Contacts(Base):
     __tablename__ = "contacts"
     __table_args__ = (
         UniqueConstraint('name', 'user_id', name='unique_tag_user'),
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        Index('ix_contacts_user_id_name_id', 'user_id', 'name', 'id'),
+        Index('ix_contacts_user_id_surname_name', 'user_id', 'surname', 'name'),
+        trigram_index('ix_contacts_name_trgm', 'name'),
+        trigram_index('ix_contacts_surname_trgm', 'surname'),
+        trigram_index('ix_contacts_email_trgm', 'email'),
+        Index('ix_contacts_user_id_birthday_key', 'user_id', 'birthday_key'),
     )
     id = Column(Integer, primary_key=True)
     name = Column(String(30), nullable=False)
@@ -17,9 +40,15 @@ class Contacts(Base):
     email = Column(String(50), nullable=False, unique=True)
     phone_number = Column(String(20), nullable=False)
     birthday = Column(Date)
+    birthday_key = Column(SmallInteger)
     user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), default=None)
     user = relationship('User', backref="contacts")
 
+    @validates('birthday')
+    def _set_birthday_key(self, key, birthday):
+        self.birthday_key = make_birthday_key(birthday)
+        return birthday
+
 
 class User(Base):
     __tablename__ = "users"
@@ -29,5 +58,4 @@ class User(Base):
     password = Column(String(255), nullable=False)
     created_at = Column('created_at', DateTime, default=func.now())
     avatar = Column(String(255), nullable=True)
-    refresh_token = Column(String(255), nullable=True)
     confirmed = Column(Boolean, default=False, nullable=True)
\ No newline at end of file
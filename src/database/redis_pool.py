@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError
+
+from src.conf.config import settings
+from src.services.metrics import Histogram, current_request
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """
+    Blocking Redis pool that records how long each command waited for a connection.
+
+    The wait includes opening a new connection when none is idle, so it is the per-command overhead of the pool.
+    Commands that wait longer than ``timeout`` for a free connection fail and are counted in :attr:`timeouts`.
+    The time from acquiring to releasing a connection is added to the Redis time of the current request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = Histogram()
+        self.timeouts = 0
+        self.startup_seconds: float | None = None
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+            connection.acquired_at = started
+            return connection
+        except ConnectionError as err:
+            if isinstance(err.__cause__, asyncio.TimeoutError):
+                self.timeouts += 1
+            raise
+        finally:
+            self.wait_histogram.observe(time.perf_counter() - started)
+
+    async def release(self, connection):
+        stats = current_request.get()
+        acquired_at = getattr(connection, "acquired_at", None)
+        connection.acquired_at = None
+        if stats is not None and acquired_at is not None:
+            stats.redis_seconds += time.perf_counter() - acquired_at
+        await super().release(connection)
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "timeouts": self.timeouts,
+            "startup_seconds": self.startup_seconds,
+            "wait_seconds": self.wait_histogram.snapshot(),
+        }
+
+
+def create_redis_pool() -> InstrumentedConnectionPool:
+    """
+    Builds the connection pool from the settings, over a unix socket when ``redis_unix_socket`` is set.
+
+    :return: A pool that has not opened any connection yet.
+    :rtype: InstrumentedConnectionPool
+    """
+    options = dict(db=settings.redis_db, max_connections=settings.redis_max_connections,
+                   timeout=settings.redis_pool_timeout, socket_timeout=settings.redis_socket_timeout,
+                   socket_connect_timeout=settings.redis_socket_connect_timeout)
+    if settings.redis_unix_socket:
+        return InstrumentedConnectionPool(connection_class=redis.UnixDomainSocketConnection,
+                                          path=settings.redis_unix_socket, **options)
+    return InstrumentedConnectionPool(host=settings.redis_host, port=settings.redis_port, **options)
+
+
+redis_pool = create_redis_pool()
+redis_client = redis.Redis.from_pool(redis_pool)
+
+
+async def open_redis() -> redis.Redis:
+    """
+    Opens the first pooled connection and records how long it took.
+
+    :return: The shared client.
+    :rtype: redis.Redis
+    """
+    started = time.perf_counter()
+    await redis_client.ping()
+    redis_pool.startup_seconds = time.perf_counter() - started
+    return redis_client
+
+
+async def close_redis() -> None:
+    """
+    Closes every pooled connection. The pool opens new ones if it is used again.
+    """
+    await redis_client.aclose()
+
+
+async def get_redis() -> redis.Redis:
+    return redis_client
@@ -0,0 +1,69 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.diagnostics import QueryDiagnostics, count_queries
+from src.services.metrics import RequestStats, current_request
+
+
+class TestQueryDiagnostics(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.addAsyncCleanup(self.engine.dispose)
+        async with self.engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    async def run_selects(self, times: int) -> str:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            async with self.engine.connect() as conn:
+                for item_id in range(times):
+                    await conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+        return output.getvalue()
+
+    async def test_logs_slow_queries_with_plan(self):
+        QueryDiagnostics(slow_seconds=0, repeat_threshold=100).attach(self.engine)
+
+        output = await self.run_selects(1)
+
+        self.assertIn("Slow query", output)
+        self.assertIn("SELECT name FROM items WHERE id = ? (0,)", output)
+        self.assertIn("SEARCH items USING INTEGER PRIMARY KEY", output)
+
+    async def test_failed_explain_keeps_the_transaction(self):
+        diagnostics = QueryDiagnostics(slow_seconds=10, repeat_threshold=100)
+        async with self.engine.begin() as conn:
+            await conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'kept')"))
+            plan = await conn.run_sync(diagnostics.explain_plan, "SELECT missing FROM items", ())
+            await conn.execute(text("INSERT INTO items (id, name) VALUES (2, 'after')"))
+
+        self.assertTrue(plan.startswith("EXPLAIN failed"))
+        async with self.engine.connect() as conn:
+            names = (await conn.execute(text("SELECT name FROM items ORDER BY id"))).scalars().all()
+        self.assertEqual(names, ["kept", "after"])
+
+    async def test_flags_repeated_statements_once(self):
+        QueryDiagnostics(slow_seconds=10, repeat_threshold=3).attach(self.engine)
+        stats = RequestStats(label="GET /items")
+        token = current_request.set(stats)
+        try:
+            output = await self.run_selects(5)
+        finally:
+            current_request.reset(token)
+
+        self.assertEqual(output.count("Possible N+1 query in GET /items: executed 3 times"), 1)
+        self.assertNotIn("Slow query", output)
+
+    async def test_count_queries(self):
+        with count_queries(self.engine) as statements:
+            await self.run_selects(2)
+        await self.run_selects(1)
+
+        self.assertEqual(statements, ["SELECT name FROM items WHERE id = ?"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
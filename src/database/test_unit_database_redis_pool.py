@@ -0,0 +1,37 @@
+import unittest
+
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeConnection
+from redis.exceptions import ConnectionError
+
+from src.database.redis_pool import InstrumentedConnectionPool
+
+
+class TestInstrumentedConnectionPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = InstrumentedConnectionPool(connection_class=FakeConnection, server=FakeServer(),
+                                               max_connections=1, timeout=0.01)
+        self.addAsyncCleanup(self.pool.disconnect)
+
+    async def test_records_waits(self):
+        connection = await self.pool.get_connection()
+        self.assertEqual(self.pool.stats()["in_use"], 1)
+        await self.pool.release(connection)
+
+        stats = self.pool.stats()
+        self.assertEqual((stats["in_use"], stats["idle"], stats["timeouts"]), (0, 1, 0))
+        self.assertEqual(stats["wait_seconds"]["count"], 1)
+
+    async def test_counts_timeouts(self):
+        connection = await self.pool.get_connection()
+        with self.assertRaises(ConnectionError):
+            await self.pool.get_connection()
+        await self.pool.release(connection)
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["wait_seconds"]["count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,88 @@
-from typing import List, Optional
+import base64
+import binascii
+import json
+from typing import AsyncIterator, List, Literal, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, or_, and_
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, Row, any_, case, delete, func, literal, or_, and_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Contacts, User
-from src.schemas import ContactCreate, ContactUpdate
-from datetime import datetime, timedelta
+from src.database.models import Contacts, User, make_birthday_key
+from src.schemas import ContactBatchOperation, ContactCreate, ContactUpdate
+from src.services.http_cache import contacts_cache
+from datetime import date, timedelta
 
 
-async def get_contacts(skip: int, limit: int, user: User, db: Session) -> List[Contacts]:
+ContactsOrder = Literal["id", "name", "surname"]
+
+
+def _order_keys(order_by: ContactsOrder) -> tuple:
+    if order_by == "name":
+        return Contacts.name, Contacts.id
+    if order_by == "surname":
+        # Names are unique per user, so (surname, name) is a unique key within the user's contacts.
+        return Contacts.surname, Contacts.name
+    return (Contacts.id,)
+
+
+def encode_cursor(order_by: ContactsOrder, contact: Contacts) -> str:
+    """
+        Builds an opaque cursor pointing right after the given contact.
+
+        :param order_by: The ordering the cursor belongs to.
+        :type order_by: ContactsOrder
+        :param contact: The last contact of the current page.
+        :type contact: Contacts
+        :return: The cursor.
+        :rtype: str
+        """
+    keys = [getattr(contact, column.key) for column in _order_keys(order_by)]
+    raw = json.dumps([order_by, *keys], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _valid_key(column: str, value) -> bool:
+    if column == "id":
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, str)
+
+
+def decode_cursor(cursor: str, order_by: ContactsOrder) -> tuple:
+    """
+        Decodes a cursor produced by :func:`encode_cursor`.
+
+        :param cursor: The cursor.
+        :type cursor: str
+        :param order_by: The ordering the cursor must belong to.
+        :type order_by: ContactsOrder
+        :return: The ordering key values of the last contact of the previous page.
+        :rtype: tuple
+        :raises HTTPException: If the cursor is malformed or belongs to another ordering.
+        """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, *keys = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        cursor_order, keys = None, []
+    columns = _order_keys(order_by)
+    if cursor_order != order_by or len(keys) != len(columns) or not all(
+            _valid_key(column.key, key) for column, key in zip(columns, keys)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return tuple(keys)
+
+
+async def get_contacts(skip: int, limit: int, user: User, db: AsyncSession, order_by: ContactsOrder = "id",
+                       after: tuple | None = None) -> List[Contacts]:
     """
         Retrieves a list of contacts for a specific user with specified pagination parameters.
 
+        When ``after`` is given the page starts right after that key (keyset pagination) and ``skip`` is ignored,
+        so deep pages cost the same as the first one.
+
         :param skip: The number of contacts to skip.
         :type skip: int
         :param limit: The maximum number of contacts to return.
@@ -20,14 +90,49 @@ async def get_contacts(skip: int, limit: int, user: User, db: Session) -> List[C
         :param user: The user to retrieve contacts for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
+        :param order_by: Order contacts by ``id``, by ``name`` and ``id`` or by ``surname`` and ``name``.
+        :type order_by: ContactsOrder
+        :param after: Ordering key values of the last contact of the previous page, see :func:`decode_cursor`.
+        :type after: tuple | None
         :return: A list of contacts.
         :rtype: List[Contact]
         """
-    return db.query(Contacts).filter(Contacts.user_id == user.id).offset(skip).limit(limit).all()
+    keys = _order_keys(order_by)
+    stmt = select(Contacts).filter(Contacts.user_id == user.id).order_by(*keys)
+    if after is not None:
+        stmt = stmt.filter(tuple_(*keys) > tuple_(*after))
+    else:
+        stmt = stmt.offset(skip)
+    result = await db.execute(stmt.limit(limit))
+    return list(result.scalars().all())
 
 
-async def get_contact(contact_id: int, user: User, db: Session) -> Contacts:
+async def stream_contacts(user: User, db: AsyncSession, batch_size: int) -> AsyncIterator[Row]:
+    """
+        Iterates over all contacts of a specific user through a server-side cursor.
+
+        Rows are fetched ``batch_size`` at a time as plain rows rather than ORM objects, so memory use does not
+        depend on the number of contacts.
+
+        :param user: The user to retrieve contacts for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :param batch_size: The number of rows fetched per round trip.
+        :type batch_size: int
+        :return: The contact rows ordered by id.
+        :rtype: AsyncIterator[Row]
+        """
+    stmt = select(Contacts.id, Contacts.name, Contacts.surname, Contacts.email, Contacts.phone_number,
+                  Contacts.birthday).filter(Contacts.user_id == user.id).order_by(Contacts.id)
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+
+async def get_contact(contact_id: int, user: User, db: AsyncSession) -> Contacts:
     """
         Retrieves a single Contact with the specified ID for a specific user.
 
@@ -36,14 +141,16 @@ async def get_contact(contact_id: int, user: User, db: Session) -> Contacts:
         :param user: The user to retrieve the Contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The Contact with the specified ID, or None if it does not exist.
         :rtype: Contact | None
         """
-    return db.query(Contacts).filter(and_(Contacts.id == contact_id, Contacts.user_id == user.id)).first()
+    stmt = select(Contacts).filter(and_(Contacts.id == contact_id, Contacts.user_id == user.id))
+    result = await db.execute(stmt)
+    return result.scalars().first()
 
 
-async def create_contact(body: ContactCreate, user: User, db: Session) -> Contacts:
+async def create_contact(body: ContactCreate, user: User, db: AsyncSession) -> Contacts:
     """
         Creates a new contact for a specific user.
 
@@ -52,42 +159,97 @@ async def create_contact(body: ContactCreate, user: User, db: Session) -> Contac
         :param user: The user to create the contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The newly created contact.
         :rtype: Contact
         """
     contact = Contacts(name=body.name, surname=body.surname, email=body.email, phone_number=body.phone_number,
                        birthday=body.birthday, user_id=user.id)
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
+    await db.refresh(contact)
+    await contacts_cache.bump(user.id)
     return contact
 
 
-async def remove_contact(contact_id: int, user: User, db: Session) -> Contacts | None:
+async def bulk_create_contacts(bodies: list[ContactCreate], user: User, db: AsyncSession) -> set[str]:
+    """
+        Creates many contacts for a specific user with a single multi-row INSERT.
+
+        Rows that violate a unique constraint (the contact name per user or the email) are skipped instead of
+        aborting the whole statement.
+
+        :param bodies: The data for the contacts to create.
+        :type bodies: list[ContactCreate]
+        :param user: The user to create the contacts for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: The emails of the contacts that were created.
+        :rtype: set[str]
+        """
+    if not bodies:
+        return set()
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    rows = [{"name": body.name, "surname": body.surname, "email": body.email, "phone_number": body.phone_number,
+             "birthday": body.birthday, "birthday_key": make_birthday_key(body.birthday), "user_id": user.id}
+            for body in bodies]
+    stmt = insert(Contacts).values(rows).on_conflict_do_nothing().returning(Contacts.email)
+    result = await db.execute(stmt)
+    created = set(result.scalars().all())
+    await db.commit()
+    if created:
+        await contacts_cache.bump(user.id)
+    return created
+
+
+async def remove_contact(contact_id: int, user: User, db: AsyncSession) -> Contacts | None:
     """
         Removes a single contact with the specified ID for a specific user.
 
+        The contact is deleted and returned by a single ``DELETE ... RETURNING`` statement.
+
         :param contact_id: The ID of the contact to remove.
         :type contact_id: int
         :param user: The user to remove the contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The removed contact, or None if it does not exist.
         :rtype: Contact | None
         """
-    contact = db.query(Contacts).filter(and_(Contacts.id == contact_id, Contacts.user_id == user.id)).first()
+    stmt = delete(Contacts).where(Contacts.id == contact_id, Contacts.user_id == user.id).returning(Contacts)
+    result = await db.execute(stmt, execution_options={"synchronize_session": False})
+    contact = result.scalars().first()
     if contact:
-        db.delete(contact)
-        db.commit()
+        await db.commit()
+        await contacts_cache.bump(user.id)
     return contact
 
 
-async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: Session) -> Contacts | None:
+def _update_values(body: ContactUpdate) -> dict:
+    columns = Contacts.__table__.c
+    values = {key: value for key, value in body.model_dump(exclude_unset=True).items()
+              if value is not None or columns[key].nullable}
+    if "birthday" in values:
+        values["birthday_key"] = make_birthday_key(values["birthday"])
+    return values
+
+
+def _id_in(ids: list[int], db: AsyncSession):
+    # On PostgreSQL ``id = ANY(:ids)`` binds one array parameter however many ids there are.
+    if db.get_bind().dialect.name == "postgresql":
+        return Contacts.id == any_(literal(ids, ARRAY(Integer)))
+    return Contacts.id.in_(ids)
+
+
+async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: AsyncSession) -> Contacts | None:
     """
         Updates a single contact with the specified ID for a specific user.
 
+        Only the fields present in the request body are written, in a single ``UPDATE ... RETURNING`` statement.
+        ``None`` is ignored for the required fields and clears the optional ones (the birthday).
+
         :param contact_id: The ID of the contact to update.
         :type contact_id: int
         :param body: The updated data for the contact.
@@ -95,22 +257,80 @@ async def update_contact(contact_id: int, body: ContactUpdate, user: User, db: S
         :param user: The user to update the contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The updated contact, or None if it does not exist.
         :rtype: Contact | None
         """
-    contact = db.query(Contacts).filter(and_(Contacts.id == contact_id, Contacts.user_id == user.id)).first()
+    values = _update_values(body)
+    if not values:
+        return await get_contact(contact_id, user, db)
+
+    stmt = update(Contacts).where(Contacts.id == contact_id, Contacts.user_id == user.id).values(**values) \
+        .returning(Contacts)
+    result = await db.execute(stmt, execution_options={"synchronize_session": False})
+    contact = result.scalars().first()
     if contact:
-        contact.name = body.name
-        contact.surname = body.surname
-        contact.email = body.email
-        contact.phone_number = body.phone_number
-        contact.birthday = body.birthday
-        db.commit()
+        await db.commit()
+        await contacts_cache.bump(user.id)
     return contact
 
 
-async def filter_contacts(name: Optional[str], surname: Optional[str], email: Optional[str], user: User, db: Session) -> \
+async def batch_contacts(operations: list[ContactBatchOperation], user: User, db: AsyncSession) -> \
+        list[Contacts | None]:
+    """
+        Gets, updates and removes many contacts of a specific user in one transaction.
+
+        The number of statements does not depend on the number of operations: the updates run as one executemany
+        ``UPDATE`` per set of changed fields, then one ``SELECT`` reads the contacts to get or update and one
+        ``DELETE ... RETURNING`` removes the others, both matching the ids with ``id = ANY(...)``.
+
+        :param operations: The operations, each on a different contact.
+        :type operations: list[ContactBatchOperation]
+        :param user: The user whose contacts to change.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: The contact of each operation, as read after the updates or as removed, or None if it does not
+            exist.
+        :rtype: list[Contact | None]
+        :raises HTTPException: 409 if an update conflicts with another contact; nothing is changed then.
+        """
+    reads, updates, deletes = [], {}, []
+    for operation in operations:
+        if operation.op == "delete":
+            deletes.append(operation.id)
+            continue
+        reads.append(operation.id)
+        if operation.op == "update" and operation.body is not None:
+            values = _update_values(operation.body)
+            if values:
+                updates[operation.id] = values
+
+    found = {}
+    try:
+        if updates:
+            await db.execute(update(Contacts).where(Contacts.user_id == user.id),
+                             [{"id": contact_id, **values} for contact_id, values in updates.items()],
+                             execution_options={"synchronize_session": None})
+        if reads:
+            stmt = select(Contacts).filter(Contacts.user_id == user.id, _id_in(reads, db))
+            result = await db.execute(stmt, execution_options={"populate_existing": True})
+            found.update((contact.id, contact) for contact in result.scalars().all())
+        if deletes:
+            stmt = delete(Contacts).where(Contacts.user_id == user.id, _id_in(deletes, db)).returning(Contacts)
+            result = await db.execute(stmt, execution_options={"synchronize_session": False})
+            found.update((contact.id, contact) for contact in result.scalars().all())
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Contact with this name or email already exists")
+    if any(contact_id in found for contact_id in [*updates, *deletes]):
+        await db.commit()
+        await contacts_cache.bump(user.id)
+    return [found.get(operation.id) for operation in operations]
+
+
+async def filter_contacts(name: Optional[str], surname: Optional[str], email: Optional[str], user: User, db: AsyncSession) -> \
 list[
     Contacts]:
     """
@@ -125,7 +345,7 @@ list[
         :param user: The user whose contacts are being filtered.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: A list of contacts that match the given filters.
         :rtype: list[Contacts]
         :raises HTTPException: If no filters are provided.
@@ -142,38 +362,85 @@ list[
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Мінімум один фільтр повинен бути заданий")
 
-    return db.query(Contacts).filter(and_(*conditions)).all()
+    result = await db.execute(select(Contacts).filter(and_(*conditions)))
+    return list(result.scalars().all())
+
 
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
-async def get_birthday_contacts(user: User, db: Session) -> list[Contacts]:
+
+async def search_contacts(query: str, limit: int, user: User, db: AsyncSession) -> list[Contacts]:
     """
-       Retrieves a list of contacts whose birthdays fall within the next seven days for a specific user.
+        Searches contacts of a specific user by name, surname and email, most relevant first.
+
+        Every word of the query must occur in at least one of the fields. Contacts where a word is a prefix of a
+        field rank first; on PostgreSQL the rest are ordered by trigram similarity. Substring matching is served
+        by the ``pg_trgm`` GIN indexes declared on the ``contacts`` table.
+
+        :param query: The search query.
+        :type query: str
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :param user: The user whose contacts are being searched.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: A list of matching contacts ordered by relevance.
+        :rtype: list[Contacts]
+        """
+    fields = (Contacts.name, Contacts.surname, Contacts.email)
+    conditions = [Contacts.user_id == user.id]
+    prefix_matches = []
+    for word in query.split():
+        escaped = _like_escape(word)
+        conditions.append(or_(*(field.ilike(f"%{escaped}%", escape="\\") for field in fields)))
+        prefix_matches.extend(field.ilike(f"{escaped}%", escape="\\") for field in fields)
+    if len(conditions) == 1:
+        return []
+
+    order = [case((or_(*prefix_matches), 1), else_=0).desc()]
+    if db.get_bind().dialect.name == "postgresql":
+        order.append(func.greatest(*(func.similarity(field, query) for field in fields)).desc())
+    order.append(Contacts.id)
+
+    stmt = select(Contacts).filter(and_(*conditions)).order_by(*order).limit(limit)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_birthday_contacts(user: User, db: AsyncSession, days: int = 7, today: date | None = None) -> \
+        list[Contacts]:
+    """
+       Retrieves a list of contacts whose birthdays fall within the next ``days`` days for a specific user.
+
+       The query is a range scan over the ``(user_id, birthday_key)`` index. A window that crosses the end of the
+       year is split into two ranges. Contacts are ordered by the upcoming birthday.
 
        :param user: The user whose contacts are being queried.
        :type user: User
        :param db: The database session.
-       :type db: Session
-       :return: A list of contacts with upcoming birthdays within the next seven days.
+       :type db: AsyncSession
+       :param days: The number of days ahead of today to include; birthdays from today through today + ``days``
+           match.
+       :type days: int
+       :param today: The first day of the window, defaults to the current date.
+       :type today: date | None
+       :return: A list of contacts with upcoming birthdays within the window.
        :rtype: list[Contacts]
        """
-    today = datetime.today().date()
-    seven_days_later = today + timedelta(days=7)
-
-    today_day_of_year = func.extract('doy', today)
-    seven_days_later_day_of_year = func.extract('doy', seven_days_later)
-
-    query = db.query(Contacts).filter(
-        Contacts.user_id == user.id,
-        or_(
-            and_(
-                func.extract('doy', Contacts.birthday) >= today_day_of_year,
-                func.extract('doy', Contacts.birthday) <= seven_days_later_day_of_year
-            ),
-            and_(
-                func.extract('doy', Contacts.birthday) < (seven_days_later_day_of_year - 365),
-                func.extract('doy', Contacts.birthday) >= today_day_of_year
-            )
-        )
-    )
-
-    return query.all()
+    today = today or date.today()
+    start = make_birthday_key(today)
+    end = make_birthday_key(today + timedelta(days=days))
+
+    if days >= 365:
+        window = Contacts.birthday_key.isnot(None)
+    elif start <= end:
+        window = Contacts.birthday_key.between(start, end)
+    else:
+        window = or_(Contacts.birthday_key >= start, Contacts.birthday_key <= end)
+
+    stmt = select(Contacts).filter(Contacts.user_id == user.id, window).order_by(
+        case((Contacts.birthday_key < start, 1), else_=0), Contacts.birthday_key, Contacts.id)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
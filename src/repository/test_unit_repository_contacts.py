@@ -1,38 +1,46 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Contacts, User
-from src.schemas import ContactCreate, ContactUpdate
+from src.schemas import ContactBatchOperation, ContactCreate, ContactUpdate
 from src.repository.contacts import (
     get_contacts,
     get_contact,
     create_contact,
     remove_contact,
-    update_contact
+    update_contact,
+    batch_contacts
 )
 
 
 class TestContacts(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = User(id=7)
+        patcher = patch("src.repository.contacts.contacts_cache")
+        self.contacts_cache = patcher.start()
+        self.contacts_cache.bump = AsyncMock()
+        self.addCleanup(patcher.stop)
 
     async def test_get_contacts(self):
         contacts = [Contacts(), Contacts(), Contacts()]
-        self.session.query().filter().offset().limit().all.return_value = contacts
+        self.result.scalars.return_value.all.return_value = contacts
         result = await get_contacts(skip=0, limit=10, user=self.user, db=self.session)
         self.assertEqual(result, contacts)
 
     async def test_get_contact_found(self):
         contact = Contacts()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalars.return_value.first.return_value = contact
         result = await get_contact(1, user=self.user, db=self.session)
         self.assertIsNotNone(result)
 
     async def test_get_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars.return_value.first.return_value = None
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
@@ -47,8 +55,6 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         self.session.commit.return_value = None
         self.session.refresh.return_value = contact
 
-        self.session.query().filter().first.return_value = contact
-
         result = await create_contact(body=body, user=self.user, db=self.session)
 
         self.assertEqual(result.name, body.name)
@@ -56,29 +62,34 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.email, body.email)
         self.assertEqual(result.phone_number, body.phone_number)
         self.assertEqual(result.birthday, body.birthday)
+        self.contacts_cache.bump.assert_awaited_once_with(7)
 
     async def test_remove_contact_found(self):
         contact = Contacts()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalars.return_value.first.return_value = contact
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
+        self.contacts_cache.bump.assert_awaited_once_with(7)
 
     async def test_remove_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars.return_value.first.return_value = None
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
+        self.contacts_cache.bump.assert_not_awaited()
 
     async def test_update_contact_found(self):
         contact_id = 1
-        contact = Contacts(id=contact_id, name="Old Name", surname="Old Surname", email="old_email@example.com")
+        contact = Contacts(id=contact_id, name="New Name", surname="New Surname", email="new_email@example.com",
+                           phone_number="123456789", birthday=None)
         user = User(id=1)
         contact_update = ContactUpdate(
             name="New Name", surname="New Surname", email="new_email@example.com", phone_number="123456789",
             birthday=None
         )
 
-        db = MagicMock(Session)
-        db.query().filter().first.return_value = contact
+        db = MagicMock(AsyncSession)
+        db.execute.return_value = self.result
+        self.result.scalars.return_value.first.return_value = contact
 
         result = await update_contact(contact_id=contact_id, body=contact_update, user=user, db=db)
 
@@ -88,7 +99,23 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         assert result.email == "new_email@example.com"
         assert result.phone_number == "123456789"
         assert result.birthday is None
+        db.execute.assert_called_once()
         db.commit.assert_called_once()
+        self.contacts_cache.bump.assert_awaited_once_with(1)
+
+    async def test_update_contact_writes_only_supplied_fields(self):
+        contact = Contacts(id=1, name="Name", surname="Surname", phone_number="555")
+        self.result.scalars.return_value.first.return_value = contact
+
+        result = await update_contact(contact_id=1, body=ContactUpdate(phone_number="555", name=None),
+                                      user=self.user, db=self.session)
+
+        assert result is contact
+        stmt = self.session.execute.call_args.args[0]
+        params = stmt.compile().params
+        assert params["phone_number"] == "555"
+        assert "name" not in params and "surname" not in params and "birthday" not in params
+        self.session.commit.assert_called_once()
 
     async def test_update_contact_not_found(self):
         contact_id = 1
@@ -98,13 +125,55 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
             birthday=None
         )
 
-        db = MagicMock(Session)
-        db.query().filter().first.return_value = None
+        db = MagicMock(AsyncSession)
+        db.execute.return_value = self.result
+        self.result.scalars.return_value.first.return_value = None
 
         result = await update_contact(contact_id=contact_id, body=contact_update, user=user, db=db)
 
         assert result is None
         db.commit.assert_not_called()
+        self.contacts_cache.bump.assert_not_awaited()
+
+    async def test_batch_contacts(self):
+        kept = Contacts(id=1, name="Kept")
+        updated = Contacts(id=2, name="Updated")
+        removed = Contacts(id=3, name="Removed")
+        self.result.scalars.return_value.all.side_effect = [[updated, kept], [removed]]
+        operations = [
+            ContactBatchOperation(op="get", id=1),
+            ContactBatchOperation(op="update", id=2, body=ContactUpdate(name="Updated")),
+            ContactBatchOperation(op="delete", id=3),
+            ContactBatchOperation(op="get", id=4),
+        ]
+
+        result = await batch_contacts(operations, user=self.user, db=self.session)
+
+        self.assertEqual(result, [kept, updated, removed, None])
+        update_stmt, rows = self.session.execute.call_args_list[0].args
+        self.assertEqual(rows, [{"id": 2, "name": "Updated"}])
+        self.assertEqual(self.session.execute.call_count, 3)
+        self.session.commit.assert_called_once()
+        self.contacts_cache.bump.assert_awaited_once_with(7)
+
+    async def test_batch_contacts_reads_only(self):
+        self.result.scalars.return_value.all.return_value = []
+        result = await batch_contacts([ContactBatchOperation(op="update", id=1, body=ContactUpdate())],
+                                      user=self.user, db=self.session)
+        self.assertEqual(result, [None])
+        self.session.execute.assert_called_once()
+        self.session.commit.assert_not_called()
+        self.contacts_cache.bump.assert_not_awaited()
+
+    async def test_batch_contacts_uses_any_on_postgresql(self):
+        self.session.get_bind.return_value.dialect.name = "postgresql"
+        self.result.scalars.return_value.all.return_value = []
+        await batch_contacts([ContactBatchOperation(op="delete", id=1), ContactBatchOperation(op="delete", id=2)],
+                             user=self.user, db=self.session)
+        stmt = self.session.execute.call_args.args[0]
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.assertIn("contacts.id = ANY (%(param_1)s::INTEGER[])", sql)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
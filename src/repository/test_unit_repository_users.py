@@ -1,25 +1,31 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User
 from src.schemas import UserModel
 from src.repository.users import (
     get_user_by_email,
     create_user,
-    update_token,
     confirmed_email,
-    update_avatar
+    update_avatar,
+    reset_avatar
 )
 from libgravatar import Gravatar
 
 class TestUsers(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
+        patcher = patch("src.repository.users.user_cache")
+        self.user_cache = patcher.start()
+        self.user_cache.invalidate = AsyncMock()
+        self.addCleanup(patcher.stop)
 
     async def test_get_user_by_email_found(self):
         user = User(email="example@example.com")
-        self.session.query().filter().first.return_value = user
+        self.result.scalars.return_value.first.return_value = user
 
         result = await get_user_by_email(email="example@example.com", db=self.session)
         self.assertIsNotNone(result)
@@ -27,7 +33,7 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
 
 
     async def test_get_user_by_email_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars.return_value.first.return_value = None
 
         result = await get_user_by_email(email="example@example.com", db=self.session)
         self.assertIsNone(result)
@@ -52,36 +58,41 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
         self.session.add.assert_called_once()
         self.session.commit.assert_called_once()
 
-    async def test_update_token(self):
-        user = User(email="user@example.com", refresh_token = None)
-        self.session.commit.return_value = None
-
-        await update_token(user=user, token="new_refresh_token", db=self.session)
-
-        self.assertEqual(user.refresh_token, "new_refresh_token")
-        self.session.commit.assert_called_once()
-
     async def test_confirmed_email(self):
         user = User(email="user@example.com", confirmed=False)
-        self.session.query().filter().first.return_value = user
+        self.result.scalars.return_value.first.return_value = user
         self.session.commit.return_value = None
 
         await confirmed_email(email="user@example.com", db=self.session)
 
         self.assertTrue(user.confirmed)
         self.session.commit.assert_called_once()
+        self.user_cache.invalidate.assert_awaited_once_with("user@example.com")
 
     async def test_update_avatar(self):
         user = User(email="user@example.com", avatar="old_avatar_url")
         new_avatar_url = "https://www.new-avatar.com/image.png"
 
-        self.session.query().filter().first.return_value = user
+        self.result.scalars.return_value.first.return_value = user
         self.session.commit.return_value = None
 
         result = await update_avatar(email="user@example.com", url=new_avatar_url, db=self.session)
 
         self.assertEqual(result.avatar, new_avatar_url)
         self.session.commit.assert_called_once()
+        self.user_cache.invalidate.assert_awaited_once_with("user@example.com")
+
+    async def test_reset_avatar(self):
+        user = User(email="user@example.com", avatar="/api/users/avatars/abc/250")
+        self.result.scalars.return_value.all.return_value = [user]
+
+        result = await reset_avatar("/api/users/avatars/abc/250", db=self.session)
+
+        self.assertEqual(result, ["user@example.com"])
+        self.assertEqual(user.avatar, Gravatar("user@example.com").get_image())
+        self.session.commit.assert_called_once()
+        self.user_cache.invalidate.assert_awaited_once_with("user@example.com")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
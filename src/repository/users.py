@@ -1,15 +1,18 @@
 from libgravatar import Gravatar
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
 from src.schemas import UserModel
+from src.services.cache import user_cache
 
 
-async def get_user_by_email(email: str, db: Session) -> User:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(email: str, db: AsyncSession) -> User:
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
     avatar = None
     try:
         g = Gravatar(body.email)
@@ -18,23 +21,46 @@ async def create_user(body: UserModel, db: Session) -> User:
         print(e)
     new_user = User(**body.model_dump(), avatar=avatar)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
-    user.refresh_token = token
-    db.commit()
+async def update_password(user: User, hashed_password: str, db: AsyncSession) -> None:
+    user.password = hashed_password
+    await db.commit()
 
 
-async def confirmed_email(email: str, db: Session) -> None:
+async def confirmed_email(email: str, db: AsyncSession) -> None:
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User:
     user = await get_user_by_email(email, db)
     user.avatar = url
-    db.commit()
-    return user
\ No newline at end of file
+    await db.commit()
+    await user_cache.invalidate(email)
+    return user
+
+
+async def reset_avatar(url: str, db: AsyncSession) -> list[str]:
+    """
+    Replaces an avatar URL that cannot be served with the user's Gravatar.
+
+    :param url: The avatar URL to replace.
+    :type url: str
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The emails of the users whose avatar was reset.
+    :rtype: list[str]
+    """
+    result = await db.execute(select(User).filter(User.avatar == url))
+    users = result.scalars().all()
+    for user in users:
+        user.avatar = Gravatar(user.email).get_image()
+    await db.commit()
+    for user in users:
+        await user_cache.invalidate(user.email)
+    return [user.email for user in users]
\ No newline at end of file
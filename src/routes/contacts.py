@@ -1,22 +1,31 @@
+from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from fastapi_limiter.depends import RateLimiter
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User
 from src.services.auth import auth_service
 from src.database.db import get_db
-from src.schemas import ContactCreate, ContactUpdate, ContactResponse
+from src.conf.config import settings
+from src.schemas import ContactCreate, ContactUpdate, ContactResponse, ContactImportResponse, ContactBatchRequest, \
+    ContactBatchResponse
 from src.repository import contacts as repository_contacts
+from src.services import contacts_io
+from src.services.http_cache import contacts_cache
+from src.services.rate_limit import user_rate_limit
 
-router = APIRouter(prefix="/contacts")
+router = APIRouter(prefix="/contacts", dependencies=[Depends(user_rate_limit("contacts"))])
+contact_adapter = TypeAdapter(ContactResponse)
+contacts_adapter = TypeAdapter(list[ContactResponse])
 
 
 @router.get("/filter", response_model=list[ContactResponse])
 async def filter_contacts(name: Optional[str] = Query(None, description="Фільтр за імям"),
                           surname: Optional[str] = Query(None, description="Фільтр за прізвищем"),
                           email: Optional[str] = Query(None, description="Фільтр за email"),
-                          db: Session = Depends(get_db),
+                          db: AsyncSession = Depends(get_db),
                           current_user: User = Depends(auth_service.get_current_user)):
     contacts = await repository_contacts.filter_contacts(name, surname, email, current_user, db)
     if not contacts:
@@ -24,37 +33,103 @@ async def filter_contacts(name: Optional[str] = Query(None, description="Філ
     return contacts
 
 
+@router.get("/search", response_model=list[ContactResponse])
+async def search_contacts(q: str = Query(min_length=1, max_length=100, description="Пошуковий запит"),
+                          limit: int = Query(20, ge=1, le=100),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    return await repository_contacts.search_contacts(q, limit, current_user, db)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def contacts_export(format: contacts_io.ExportFormat = Query("csv", description="csv, jsonl або vcard"),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    batch_size = settings.contacts_export_batch_size
+    rows = repository_contacts.stream_contacts(current_user, db, batch_size)
+    return StreamingResponse(
+        contacts_io.export_contacts(rows, format, batch_size),
+        media_type=contacts_io.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{contacts_io.EXPORT_FILENAMES[format]}"'},
+    )
+
+
 @router.get("/birthday", response_model=List[ContactResponse])
-async def get_birthday_contracts(db: Session = Depends(get_db),
+async def get_birthday_contracts(request: Request,
+                                 days: int = Query(7, ge=0, le=366, description="Кількість днів наперед"),
+                                 db: AsyncSession = Depends(get_db),
                                  current_user: User = Depends(auth_service.get_current_user)):
-    contacts = await repository_contacts.get_birthday_contacts(current_user, db)
-    return contacts
+    async def load():
+        contacts = await repository_contacts.get_birthday_contacts(current_user, db, days=days)
+        return contacts_adapter.dump_json(contacts), {}
+
+    key = f"{request.url.path}?days={days}&today={date.today().isoformat()}"
+    return await contacts_cache.respond(request, current_user.id, load, key=key)
 
 
 @router.get("/", response_model=List[ContactResponse])
-async def check_contacts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db),
+async def check_contacts(request: Request, skip: int = 0, limit: int = Query(100, ge=1),
+                         cursor: Optional[str] = Query(None, description="Курсор з заголовка X-Next-Cursor"),
+                         order_by: repository_contacts.ContactsOrder = "id",
+                         db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
-    contacts = await repository_contacts.get_contacts(skip, limit, current_user, db)
-    return contacts
+    after = repository_contacts.decode_cursor(cursor, order_by) if cursor else None
+
+    async def load():
+        contacts = await repository_contacts.get_contacts(skip, limit, current_user, db, order_by=order_by,
+                                                          after=after)
+        headers = {}
+        if len(contacts) == limit:
+            headers["X-Next-Cursor"] = repository_contacts.encode_cursor(order_by, contacts[-1])
+        return contacts_adapter.dump_json(contacts), headers
+
+    return await contacts_cache.respond(request, current_user.id, load)
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
-async def check_contact(contact_id: int, db: Session = Depends(get_db),
+async def check_contact(request: Request, contact_id: int, db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
-    contact = await repository_contacts.get_contact(contact_id, current_user, db)
-    if contact is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
-    return contact
+    async def load():
+        contact = await repository_contacts.get_contact(contact_id, current_user, db)
+        if contact is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+        return contact_adapter.dump_json(contact), {}
+
+    return await contacts_cache.respond(request, current_user.id, load)
 
 
 @router.post("/", response_model=ContactResponse)
-async def contact_create(body: ContactCreate, db: Session = Depends(get_db),
+async def contact_create(body: ContactCreate, db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     return await repository_contacts.create_contact(body, current_user, db)
 
 
+@router.post("/import", response_model=ContactImportResponse)
+async def contacts_import(file: UploadFile = File(),
+                          format: Optional[contacts_io.ImportFormat] = Query(None, description="csv або jsonl"),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    fmt = format or contacts_io.guess_import_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Невідомий формат файлу")
+    return await contacts_io.import_contacts(file.file, fmt, current_user, db, settings.contacts_import_batch_size)
+
+
+@router.post("/batch", response_model=ContactBatchResponse)
+async def contacts_batch(body: ContactBatchRequest, db: AsyncSession = Depends(get_db),
+                         current_user: User = Depends(auth_service.get_current_user)):
+    contacts = await repository_contacts.batch_contacts(body.operations, current_user, db)
+    return {"results": [
+        {"op": operation.op, "id": operation.id, "status": status.HTTP_200_OK, "contact": contact}
+        if contact is not None else
+        {"op": operation.op, "id": operation.id, "status": status.HTTP_404_NOT_FOUND, "detail": "Note not found"}
+        for operation, contact in zip(body.operations, contacts)
+    ]}
+
+
 @router.put("/{contact_id}", response_model=ContactResponse)
-async def contact_update(body: ContactUpdate, contact_id: int, db: Session = Depends(get_db),
+@router.patch("/{contact_id}", response_model=ContactResponse)
+async def contact_update(body: ContactUpdate, contact_id: int, db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     contact = await repository_contacts.update_contact(contact_id, body, current_user, db)
     if contact is None:
@@ -63,7 +138,7 @@ async def contact_update(body: ContactUpdate, contact_id: int, db: Session = Dep
 
 
 @router.delete("/{contact_id}", response_model=ContactResponse)
-async def contact_remove(contact_id: int, db: Session = Depends(get_db),
+async def contact_remove(contact_id: int, db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     contact = await repository_contacts.remove_contact(contact_id, current_user, db)
     if contact is None:
@@ -0,0 +1,91 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from src.conf.config import settings
+from src.database.db import engine
+from src.database.redis_pool import redis_pool
+from src.services.passwords import password_hasher
+from src.services.jobs import job_queue
+from src.services.metrics import request_metrics
+
+
+async def require_internal_token(x_internal_token: str | None = Header(None)):
+    """
+    Lets a request through only if its ``X-Internal-Token`` header matches ``settings.internal_token``.
+
+    The internal endpoints are not served at all when no token is configured.
+
+    :param x_internal_token: The token sent by the client.
+    :type x_internal_token: str | None
+    :raises HTTPException: 404 if no token is configured, 401 if the token is missing or wrong.
+    """
+    if not settings.internal_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(x_internal_token.encode(),
+                                                              settings.internal_token.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal token")
+
+
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False,
+                   dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Returns per-route request metrics for Prometheus.
+
+    :return: Latency histograms, request counts by status, SQL statement counts, database time and Redis time
+        by route, in the Prometheus text exposition format.
+    :rtype: PlainTextResponse
+    """
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    """
+    Returns live statistics of the database connection pool.
+
+    :return: Pool size, checked in/out connections, overflow, checkout timeouts and a histogram of
+        checkout wait times.
+    :rtype: dict
+    """
+    return engine.pool.stats()
+
+
+@router.get("/redis/pool")
+async def redis_pool_stats():
+    """
+    Returns live statistics of the shared Redis connection pool.
+
+    :return: Connection limit, connections in use and idle, acquire timeouts, the time taken to open the pool
+        on startup and a histogram of the time commands waited for a connection.
+    :rtype: dict
+    """
+    return redis_pool.stats()
+
+
+@router.get("/auth/hashing")
+async def password_hashing_stats():
+    """
+    Returns statistics of the password hashing worker pool.
+
+    :return: Worker count, in-flight and queued operations, rejections and a histogram of hash latency.
+    :rtype: dict
+    """
+    return password_hasher.stats()
+
+
+@router.get("/jobs")
+async def job_stats():
+    """
+    Returns background job counters and queue lengths.
+
+    :return: Enqueued, succeeded, retried and dead-lettered job counts and the number of queued, delayed and
+        dead-lettered jobs.
+    :rtype: dict
+    """
+    return await job_queue.stats()
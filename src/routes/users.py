@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status, UploadFile, File
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.conf.config import settings
+from src.services.avatars import AvatarUploader, LocalAvatarStore, get_avatar_uploader, read_avatar
+from src.services.http_cache import etag_matches
 from src.schemas import UserDb
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -20,16 +20,24 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 
 @router.patch("/avatar", response_model=UserDb)
 async def update_avatar_user(file: UploadFile = File(), current_user: User = Depends(auth_service.get_current_user),
-                             db: Session = Depends(get_db)):
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
-    )
-
-    r = cloudinary.uploader.upload(file.file, public_id=f"ContactsApp/{current_user.username}", overwrite=True)
-    src_url = cloudinary.CloudinaryImage(f'NotesApp/{current_user.username}') \
-        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
+                             db: AsyncSession = Depends(get_db),
+                             uploader: AvatarUploader = Depends(get_avatar_uploader)):
+    data = await read_avatar(file)
+    src_url = await uploader.upload(data, public_id=f"ContactsApp/{current_user.username}")
     user = await repository_users.update_avatar(current_user.email, src_url, db)
     return user
+
+
+@router.get("/avatars/{digest}/{size}", response_class=FileResponse)
+async def read_avatar_thumbnail(request: Request, size: int, digest: str = Path(pattern="^[0-9a-f]{64}$"),
+                                store: AvatarUploader = Depends(get_avatar_uploader)):
+    if not isinstance(store, LocalAvatarStore) or size not in store.sizes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    path = store.path(digest, size)
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    etag = f'"{digest}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type="image/png", headers=headers)
@@ -1,7 +1,7 @@
 from datetime import date, datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, field_validator
 
 
 class ContactBase(BaseModel):
@@ -33,6 +33,47 @@ class ContactUpdate(BaseModel):
     phone_number: str | None = Field(default=None, max_length=20)
     birthday: date | None = None
 
+
+class ContactBatchOperation(BaseModel):
+    op: Literal["get", "update", "delete"]
+    id: int
+    body: ContactUpdate | None = None
+
+
+class ContactBatchRequest(BaseModel):
+    operations: list[ContactBatchOperation] = Field(min_length=1, max_length=1000)
+
+    @field_validator("operations")
+    @classmethod
+    def one_operation_per_contact(cls, operations: list[ContactBatchOperation]) -> list[ContactBatchOperation]:
+        if len({operation.id for operation in operations}) != len(operations):
+            raise ValueError("each contact may appear in one operation only")
+        return operations
+
+
+class ContactBatchResult(BaseModel):
+    op: Literal["get", "update", "delete"]
+    id: int
+    status: int
+    contact: ContactResponse | None = None
+    detail: str | None = None
+
+
+class ContactBatchResponse(BaseModel):
+    results: list[ContactBatchResult]
+
+
+class ContactImportError(BaseModel):
+    row: int
+    detail: str
+
+
+class ContactImportResponse(BaseModel):
+    total: int = 0
+    imported: int = 0
+    errors: list[ContactImportError] = []
+
+
 class UserModel(BaseModel):
     username: str = Field(min_length=5, max_length=16)
     email: EmailStr
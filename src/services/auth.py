@@ -1,32 +1,34 @@
 from typing import Optional
 
-import pickle
 from src.conf.config import settings
-import redis
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone, UTC
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.repository import users as repository_users
+from src.services.cache import UserSnapshot, token_cache, user_cache
+from src.services.passwords import password_hasher
+from src.services.sessions import session_store
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    hasher = password_hasher
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = redis.asyncio.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+    cache = user_cache
+    tokens = token_cache
+    sessions = session_store
 
 
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await self.hasher.hash(password)
 
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password, hashed_password) -> tuple[bool, str | None]:
+        return await self.hasher.verify_and_update(plain_password, hashed_password)
 
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
         to_encode = data.copy()
@@ -47,12 +49,11 @@ class Auth:
 
     async def create_refresh_token(self, data: dict, expires_delta: Optional[float] = None):
         to_encode = data.copy()
-        from datetime import datetime, timedelta, timezone
 
         if expires_delta:
             expire = datetime.now(timezone.utc) + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.now(timezone.utc) + timedelta(days=15)
+            expire = datetime.now(timezone.utc) + timedelta(seconds=settings.refresh_token_ttl)
 
         to_encode.update({
             "iat": datetime.now(timezone.utc),
@@ -70,42 +71,80 @@ class Auth:
                 self.SECRET_KEY,
                 algorithms=[self.ALGORITHM]
             )
-            if payload["scope"] == "refresh_token":
-                email = payload["sub"]
-                return email
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid scope for token")
+            if payload["scope"] != "refresh_token":
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid scope for token")
+            # Tokens issued before sessions moved to Redis carry no session and must log in again.
+            if not payload.get("sid") or not payload.get("jti"):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+            return payload
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-        try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload["scope"] == "access_token":
-                email = payload["sub"]
-                if email is None:
-                    raise credentials_exception
-            else:
+        digest = self.tokens.digest(token)
+        payload = self.tokens.get(digest)
+        if payload is None:
+            try:
+                payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            except JWTError:
                 raise credentials_exception
-        except JWTError:
+            # Cached before the deny list is checked: a revocation either is seen by the check or publishes its
+            # eviction after the claims are cached, so it cannot slip in between.
+            self.tokens.set(digest, payload)
+            if await self.tokens.is_revoked(digest):
+                self.tokens.pop(digest)
+                raise credentials_exception
+        if payload.get("scope") != "access_token" or payload.get("sub") is None:
             raise credentials_exception
+        email = payload["sub"]
 
-        user = await self.r.get(f"user:{email}")
+        user = await self.cache.get(email)
         if user is None:
-            user = await repository_users.get_user_by_email(email, db)
-            if user is None:
+            db_user = await repository_users.get_user_by_email(email, db)
+            if db_user is None:
                 raise credentials_exception
-            await self.r.set(f"user:{email}", pickle.dumps(user))
-            await self.r.expire(f"user:{email}", 900)
-        else:
-            user = pickle.loads(user)
+            user = UserSnapshot.from_user(db_user)
+            await self.cache.set(user)
         return user
 
+    async def create_session_tokens(self, email: str, sid: str, jti: str) -> dict:
+        """
+        Issues the access token and the refresh token of a session.
+
+        :param email: The email of the user.
+        :type email: str
+        :param sid: The session ID.
+        :type sid: str
+        :param jti: The ID of the refresh token, as returned by the session store.
+        :type jti: str
+        :return: The response body of the login and refresh endpoints.
+        :rtype: dict
+        """
+        access_token = await self.create_access_token(data={"sub": email, "sid": sid})
+        refresh_token = await self.create_refresh_token(data={"sub": email, "sid": sid, "jti": jti})
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+    async def revoke_token(self, token: str) -> None:
+        """
+        Rejects an access token on every worker for the rest of its life and ends the session it was issued for.
+
+        :param token: The access token.
+        :type token: str
+        """
+        try:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+        except JWTError:
+            return
+        await self.tokens.revoke(self.tokens.digest(token), payload["exp"])
+        if payload.get("sid"):
+            await self.sessions.revoke(payload["sid"])
+
     async def create_email_token(self, data: dict):
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + timedelta(days=7)
@@ -0,0 +1,185 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import Protocol
+
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.repository import users as repository_users
+from src.services.jobs import PermanentJobError, job, job_queue
+
+AVATAR_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpeg",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+
+
+def sniff_image_format(data: bytes) -> str | None:
+    """
+    Detects the image format from the leading bytes of a file.
+
+    :param data: The file content.
+    :type data: bytes
+    :return: ``png``, ``jpeg``, ``gif`` or ``webp``, or None if the content is not a supported image.
+    :rtype: str | None
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    for signature, fmt in AVATAR_SIGNATURES.items():
+        if data.startswith(signature):
+            return fmt
+    return None
+
+
+async def read_avatar(file: UploadFile, max_bytes: int | None = None) -> bytes:
+    """
+    Reads an uploaded avatar and checks its size and format before it is sent anywhere.
+
+    :param file: The uploaded file.
+    :type file: UploadFile
+    :param max_bytes: The maximum accepted size, defaults to ``settings.avatar_max_bytes``.
+    :type max_bytes: int | None
+    :return: The file content.
+    :rtype: bytes
+    :raises HTTPException: 413 if the file is too large, 415 if it is not a PNG, JPEG, GIF or WebP image.
+    """
+    max_bytes = max_bytes or settings.avatar_max_bytes
+    data = await file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Avatar must not exceed {max_bytes} bytes")
+    if sniff_image_format(data) is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Avatar must be a PNG, JPEG, GIF or WebP image")
+    return data
+
+
+class AvatarUploader(Protocol):
+    async def upload(self, data: bytes, public_id: str) -> str:
+        """
+        Stores an avatar and returns the URL it is served from.
+        """
+        ...
+
+
+class CloudinaryUploader:
+    """
+    Uploads avatars to Cloudinary from a worker thread. The client is configured once, on construction.
+    """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str, size: int = 250):
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret, secure=True)
+        self.size = size
+
+    def _upload(self, data: bytes, public_id: str) -> str:
+        r = cloudinary.uploader.upload(io.BytesIO(data), public_id=public_id, overwrite=True)
+        return cloudinary.CloudinaryImage(public_id) \
+            .build_url(width=self.size, height=self.size, crop='fill', version=r.get('version'))
+
+    async def upload(self, data: bytes, public_id: str) -> str:
+        return await run_in_threadpool(self._upload, data, public_id)
+
+
+class LocalAvatarStore:
+    """
+    Stores avatars on local disk as square PNG thumbnails named by the SHA-256 of the uploaded file.
+
+    The upload is decoded once with Pillow and every size in ``sizes`` is written to ``<root>/<digest>/<size>.png``.
+    Uploading the same image again finds the existing thumbnails and skips decoding. Because file names are
+    content addressed, the served files never change and can be cached forever. The URL only depends on the
+    content, so with ``defer`` the thumbnails are generated by a ``store_avatar`` job in the worker process and the
+    URL is returned right away, once the upload has passed Pillow's cheap ``verify()`` check.
+    """
+
+    def __init__(self, root: str | Path, sizes: list[int], url_prefix: str = "/api/users/avatars",
+                 defer: bool = False):
+        try:
+            from PIL import Image, ImageOps
+        except ImportError as err:
+            raise RuntimeError("avatar_storage='local' requires Pillow to be installed") from err
+        self.image, self.image_ops = Image, ImageOps
+        self.decode_errors = (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+        self.root = Path(root)
+        self.sizes = sorted(sizes)
+        self.url_prefix = url_prefix
+        self.defer = defer
+
+    def path(self, digest: str, size: int) -> Path:
+        return self.root / digest / f"{size}.png"
+
+    def url(self, digest: str) -> str:
+        return f"{self.url_prefix}/{digest}/{self.sizes[-1]}"
+
+    def _verify(self, data: bytes) -> None:
+        try:
+            with self.image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except self.decode_errors:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="Avatar could not be decoded")
+
+    def _store(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        if all(self.path(digest, size).exists() for size in self.sizes):
+            return digest
+        try:
+            with self.image.open(io.BytesIO(data)) as image:
+                image = self.image_ops.exif_transpose(image).convert("RGBA")
+        except self.decode_errors:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="Avatar could not be decoded")
+        directory = self.root / digest
+        directory.mkdir(parents=True, exist_ok=True)
+        for size in self.sizes:
+            thumbnail = self.image_ops.fit(image, (size, size), self.image.Resampling.LANCZOS)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as out:
+                thumbnail.save(out, format="PNG")
+            os.replace(tmp, self.path(digest, size))
+        return digest
+
+    async def upload(self, data: bytes, public_id: str) -> str:
+        if self.defer:
+            await run_in_threadpool(self._verify, data)
+            digest = hashlib.sha256(data).hexdigest()
+            await job_queue.enqueue("store_avatar", base64.b64encode(data).decode())
+        else:
+            digest = await run_in_threadpool(self._store, data)
+        return self.url(digest)
+
+
+if settings.avatar_storage == "local":
+    avatar_uploader = LocalAvatarStore(settings.avatar_local_dir, settings.avatar_sizes,
+                                       defer=settings.avatar_processing == "job")
+else:
+    avatar_uploader = CloudinaryUploader(settings.cloudinary_name, settings.cloudinary_api_key,
+                                         settings.cloudinary_api_secret)
+
+
+def get_avatar_uploader() -> AvatarUploader:
+    return avatar_uploader
+
+
+@job("store_avatar")
+async def store_avatar(data: str) -> None:
+    if not isinstance(avatar_uploader, LocalAvatarStore):
+        raise RuntimeError("store_avatar jobs require avatar_storage='local'")
+    raw = base64.b64decode(data)
+    try:
+        await run_in_threadpool(avatar_uploader._store, raw)
+    except HTTPException as err:
+        # The image passed verify() but cannot be decoded: retrying would not help, and its URL would never
+        # be served.
+        async with SessionLocal() as db:
+            await repository_users.reset_avatar(avatar_uploader.url(hashlib.sha256(raw).hexdigest()), db)
+        raise PermanentJobError(err.detail) from err
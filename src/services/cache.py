@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.redis_pool import redis_client
+
+
+@dataclass(slots=True, frozen=True)
+class UserSnapshot:
+    """
+    Detached, read-only view of a user as cached for authenticated requests.
+
+    The snapshot is serialized as a compact JSON array prefixed with ``VERSION``. Payloads written by another
+    version (or by the old pickle-based cache) fail to decode and are treated as a cache miss.
+    """
+    VERSION = 1
+
+    id: int
+    email: str
+    username: str | None
+    avatar: str | None
+    confirmed: bool
+    created_at: datetime | None
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        """
+        Builds a snapshot from a ``User`` model instance.
+
+        :param user: The user to snapshot.
+        :type user: User
+        :return: The snapshot.
+        :rtype: UserSnapshot
+        """
+        return cls(id=user.id, email=user.email, username=user.username, avatar=user.avatar,
+                   confirmed=bool(user.confirmed), created_at=user.created_at)
+
+    def dumps(self) -> bytes:
+        """
+        Serializes the snapshot.
+
+        :return: The encoded snapshot.
+        :rtype: bytes
+        """
+        created_at = self.created_at.isoformat() if self.created_at else None
+        return json.dumps([self.VERSION, self.id, self.email, self.username, self.avatar, self.confirmed,
+                           created_at], separators=(",", ":")).encode()
+
+    @classmethod
+    def loads(cls, data: bytes | str) -> "UserSnapshot | None":
+        """
+        Deserializes a snapshot produced by :meth:`dumps`.
+
+        :param data: The encoded snapshot.
+        :type data: bytes | str
+        :return: The snapshot, or None if the payload is malformed or has another schema version.
+        :rtype: UserSnapshot | None
+        """
+        try:
+            version, id_, email, username, avatar, confirmed, created_at = json.loads(data)
+            if version != cls.VERSION:
+                return None
+            return cls(id=id_, email=email, username=username, avatar=avatar, confirmed=confirmed,
+                       created_at=datetime.fromisoformat(created_at) if created_at else None)
+        except (ValueError, TypeError):
+            return None
+
+
+class LRUCache:
+    """
+    Bounded in-process mapping whose entries expire ``ttl`` seconds after they were set, unless set with their
+    own ``ttl``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class UserCache:
+    """
+    Two-tier cache of :class:`UserSnapshot` objects keyed by email.
+
+    Lookups hit a per-worker :class:`LRUCache` first and fall back to Redis. Invalidations drop both tiers and
+    are published on :attr:`channel` so that the other workers evict their local copy as well.
+    """
+    channel = "user-cache:invalidate"
+
+    def __init__(self, r: redis.Redis, ttl: int, local_ttl: float, local_size: int):
+        self.r = r
+        self.ttl = ttl
+        self.local = LRUCache(maxsize=local_size, ttl=local_ttl)
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"user:{email}"
+
+    async def get(self, email: str) -> UserSnapshot | None:
+        """
+        Retrieves a cached user.
+
+        :param email: The email of the user.
+        :type email: str
+        :return: The cached user, or None on a miss.
+        :rtype: UserSnapshot | None
+        """
+        user = self.local.get(email)
+        if user is not None:
+            return user
+        cached = await self.r.get(self.key(email))
+        user = UserSnapshot.loads(cached) if cached is not None else None
+        if user is not None:
+            self.local.set(email, user)
+        return user
+
+    async def set(self, user: UserSnapshot) -> None:
+        """
+        Stores a user in both tiers.
+
+        :param user: The user to cache.
+        :type user: UserSnapshot
+        """
+        self.local.set(user.email, user)
+        await self.r.set(self.key(user.email), user.dumps(), ex=self.ttl)
+
+    async def invalidate(self, email: str) -> None:
+        """
+        Drops a user from both tiers and notifies the other workers.
+
+        Redis errors are reported and swallowed: the write that triggered the invalidation has already been
+        committed and the Redis entry expires on its own.
+
+        :param email: The email of the user.
+        :type email: str
+        """
+        self.local.pop(email)
+        try:
+            async with self.r.pipeline(transaction=False) as pipe:
+                pipe.delete(self.key(email))
+                pipe.publish(self.channel, email)
+                await pipe.execute()
+        except RedisError as err:
+            print(f"Error invalidating cached user: {err}")
+
+    async def listen(self, retry_backoff: float = 0.5) -> None:
+        """
+        Evicts local entries invalidated by other workers. Runs until cancelled.
+
+        The local tier is cleared whenever the listener (re)subscribes, since invalidations published while it
+        was disconnected are lost.
+        """
+        await listen_for_evictions(self.r, self.channel, self.local.pop, on_subscribe=self.local.clear,
+                                   retry_backoff=retry_backoff)
+
+
+async def listen_for_evictions(r: redis.Redis, channel: str, evict, on_subscribe=None, retry_backoff: float = 0.5,
+                               max_backoff: float = 30.0) -> None:
+    """
+    Calls ``evict`` with every key published on ``channel``. Runs until cancelled.
+
+    When the connection fails the listener subscribes again, waiting ``retry_backoff`` seconds at first and twice
+    as long after each failed attempt, up to ``max_backoff``.
+
+    :param r: The Redis client.
+    :type r: redis.Redis
+    :param channel: The pub/sub channel.
+    :type channel: str
+    :param evict: Drops a key from a local cache.
+    :param on_subscribe: Called after every successful subscription, typically to clear the local cache since
+        messages published while disconnected are lost.
+    :param retry_backoff: The first delay before subscribing again, in seconds.
+    :type retry_backoff: float
+    :param max_backoff: The longest delay before subscribing again, in seconds.
+    :type max_backoff: float
+    """
+    delay = retry_backoff
+    while True:
+        pubsub = r.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            if on_subscribe is not None:
+                on_subscribe()
+            delay = retry_backoff
+            while True:
+                # Poll well within the pool's socket timeout instead of blocking on the socket indefinitely.
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    key = message["data"]
+                    evict(key.decode() if isinstance(key, bytes) else key)
+        except RedisError as err:
+            print(f"Cache eviction listener for {channel} disconnected, retrying in {delay:g}s: {err}")
+        finally:
+            try:
+                await pubsub.aclose()
+            except RedisError:
+                pass
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_backoff)
+
+
+class TokenCache:
+    """
+    Per-worker cache of verified JWT claims keyed by a digest of the token, with a deny list in Redis.
+
+    A token is decoded and its signature checked once per worker; later requests with the same token reuse the
+    claims until the token's ``exp``. Revoked tokens are recorded in Redis until they would have expired, so that
+    every worker rejects them on the next decode, and published on :attr:`channel` so that workers that already
+    cached them evict them.
+    """
+    channel = "token-cache:revoked"
+
+    def __init__(self, r: redis.Redis, maxsize: int):
+        self.r = r
+        self.local = LRUCache(maxsize=maxsize, ttl=0)
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def deny_key(digest: str) -> str:
+        return f"token:revoked:{digest}"
+
+    def get(self, digest: str) -> dict | None:
+        return self.local.get(digest)
+
+    def set(self, digest: str, claims: dict) -> None:
+        """
+        Caches verified claims until the token expires.
+
+        :param digest: The digest of the token.
+        :type digest: str
+        :param claims: The verified claims; tokens without ``exp`` are not cached.
+        :type claims: dict
+        """
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            self.local.set(digest, claims, ttl=ttl)
+
+    def pop(self, digest: str) -> None:
+        self.local.pop(digest)
+
+    async def is_revoked(self, digest: str) -> bool:
+        return bool(await self.r.exists(self.deny_key(digest)))
+
+    async def revoke(self, digest: str, expires_at: float) -> None:
+        """
+        Denies a token on every worker until it expires.
+
+        :param digest: The digest of the token.
+        :type digest: str
+        :param expires_at: The token's ``exp``, as a UNIX timestamp.
+        :type expires_at: float
+        """
+        self.local.pop(digest)
+        ttl = int(expires_at - time.time()) + 1
+        if ttl <= 0:
+            return
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.set(self.deny_key(digest), 1, ex=ttl)
+            pipe.publish(self.channel, digest)
+            await pipe.execute()
+
+    async def listen(self, retry_backoff: float = 0.5) -> None:
+        """
+        Evicts tokens revoked on other workers. Runs until cancelled.
+
+        Every cached token is dropped whenever the listener (re)subscribes, since revocations published while it
+        was disconnected are lost; the next request with each token checks the deny list again.
+        """
+        await listen_for_evictions(self.r, self.channel, self.local.pop, on_subscribe=self.local.clear,
+                                   retry_backoff=retry_backoff)
+
+
+user_cache = UserCache(redis_client,
+                       ttl=settings.user_cache_ttl, local_ttl=settings.user_cache_local_ttl,
+                       local_size=settings.user_cache_local_size)
+token_cache = TokenCache(redis_client, maxsize=settings.auth_token_cache_size)
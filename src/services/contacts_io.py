@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, BinaryIO, Iterator, Literal
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.repository import contacts as repository_contacts
+from src.schemas import ContactCreate, ContactImportError, ContactImportResponse
+
+ImportFormat = Literal["csv", "jsonl"]
+ExportFormat = Literal["csv", "jsonl", "vcard"]
+
+IMPORT_SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "vcard": "text/vcard"}
+EXPORT_FILENAMES = {"csv": "contacts.csv", "jsonl": "contacts.jsonl", "vcard": "contacts.vcf"}
+EXPORT_FIELDS = ("id", "name", "surname", "email", "phone_number", "birthday")
+
+
+def guess_import_format(filename: str | None) -> ImportFormat | None:
+    """
+    Guesses the import format from the name of the uploaded file.
+
+    :param filename: The name of the uploaded file.
+    :type filename: str | None
+    :return: The format, or None if the suffix is unknown.
+    :rtype: ImportFormat | None
+    """
+    for suffix, fmt in IMPORT_SUFFIXES.items():
+        if filename and filename.lower().endswith(suffix):
+            return fmt
+    return None
+
+
+def _validate_csv(record: dict) -> ContactCreate:
+    return ContactCreate.model_validate({key: value or None for key, value in record.items() if key})
+
+
+def read_contacts(file: BinaryIO, fmt: ImportFormat) -> Iterator[tuple[int, ContactCreate | ContactImportError]]:
+    """
+    Lazily parses and validates an uploaded CSV (with a header row) or JSON Lines file.
+
+    :param file: The uploaded file.
+    :type file: BinaryIO
+    :param fmt: The format of the file.
+    :type fmt: ImportFormat
+    :return: Pairs of the 1-based data row number and either the validated contact or the row error. A file that
+        is not valid UTF-8 or not valid CSV ends with an error for the row the reader stopped at.
+    :rtype: Iterator[tuple[int, ContactCreate | ContactImportError]]
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    number = 0
+    try:
+        if fmt == "csv":
+            rows = enumerate(csv.DictReader(text), start=1)
+            validate = _validate_csv
+        else:
+            rows = ((number, line) for number, line in enumerate(text, start=1) if line.strip())
+            validate = ContactCreate.model_validate_json
+        for number, raw in rows:
+            try:
+                yield number, validate(raw)
+            except ValidationError as err:
+                detail = "; ".join(f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}"
+                                   for error in err.errors())
+                yield number, ContactImportError(row=number, detail=detail)
+    except (UnicodeDecodeError, csv.Error) as err:
+        # The reader cannot resynchronize after a broken byte sequence or quote, so the rest of the file is skipped.
+        yield number + 1, ContactImportError(row=number + 1, detail=f"Unreadable file from this row on: {err}")
+    finally:
+        text.detach()
+
+
+async def import_contacts(file: BinaryIO, fmt: ImportFormat, user: User, db: AsyncSession,
+                          batch_size: int) -> ContactImportResponse:
+    """
+    Streams contacts from an uploaded file into the database in batches of ``batch_size`` rows.
+
+    Invalid rows and rows that clash with an existing contact are reported and skipped; the rest of the batch is
+    still imported.
+
+    :param file: The uploaded file.
+    :type file: BinaryIO
+    :param fmt: The format of the file.
+    :type fmt: ImportFormat
+    :param user: The user to import the contacts for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :param batch_size: The number of rows inserted per statement.
+    :type batch_size: int
+    :return: The number of processed and imported rows and the per-row errors.
+    :rtype: ContactImportResponse
+    """
+    report = ContactImportResponse()
+    batch: dict[str, tuple[int, ContactCreate]] = {}
+
+    async def flush():
+        created = await repository_contacts.bulk_create_contacts([body for _, body in batch.values()], user, db)
+        report.imported += len(created)
+        report.errors.extend(ContactImportError(row=number, detail="Contact with this name or email already exists")
+                             for email, (number, _) in batch.items() if email not in created)
+        batch.clear()
+
+    for number, item in read_contacts(file, fmt):
+        report.total += 1
+        if isinstance(item, ContactImportError):
+            report.errors.append(item)
+        elif item.email in batch:
+            report.errors.append(ContactImportError(row=number, detail="Duplicate email in the file"))
+        else:
+            batch[item.email] = (number, item)
+            if len(batch) >= batch_size:
+                await flush()
+    if batch:
+        await flush()
+    report.errors.sort(key=lambda error: error.row)
+    return report
+
+
+def _csv_line(row) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(row)
+    return buffer.getvalue()
+
+
+def _jsonl_line(row) -> str:
+    record = row._asdict()
+    record["birthday"] = row.birthday.isoformat() if row.birthday else None
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _vcard_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace(",", "\\,").replace(";", "\\;")
+
+
+def _vcard(row) -> str:
+    name, surname = _vcard_escape(row.name), _vcard_escape(row.surname)
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"N:{surname};{name};;;", f"FN:{name} {surname}",
+             f"EMAIL;TYPE=INTERNET:{_vcard_escape(row.email)}", f"TEL:{_vcard_escape(row.phone_number)}"]
+    if row.birthday:
+        lines.append(f"BDAY:{row.birthday.isoformat()}")
+    lines.append("END:VCARD")
+    return "\r\n".join(lines) + "\r\n"
+
+
+async def export_contacts(rows: AsyncIterator, fmt: ExportFormat, chunk_rows: int) -> AsyncIterator[str]:
+    """
+    Serializes contact rows into chunks of CSV (with a header row), JSON Lines or vCard 3.0 text.
+
+    :param rows: The contact rows, see :func:`src.repository.contacts.stream_contacts`.
+    :type rows: AsyncIterator
+    :param fmt: The output format.
+    :type fmt: ExportFormat
+    :param chunk_rows: The number of rows per yielded chunk.
+    :type chunk_rows: int
+    :return: The serialized chunks.
+    :rtype: AsyncIterator[str]
+    """
+    serialize = {"csv": _csv_line, "jsonl": _jsonl_line, "vcard": _vcard}[fmt]
+    chunk = [_csv_line(EXPORT_FIELDS)] if fmt == "csv" else []
+    async for row in rows:
+        chunk.append(serialize(row))
+        if len(chunk) >= chunk_rows:
+            yield "".join(chunk)
+            chunk.clear()
+    if chunk:
+        yield "".join(chunk)
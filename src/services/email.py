@@ -1,37 +1,181 @@
+import asyncio
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pydantic import EmailStr
 from ..conf.config import settings
 from src.services.auth import auth_service
+from src.services.jobs import job
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME="Confirmed",
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
+templates = Environment(loader=FileSystemLoader(Path(__file__).parent / 'templates'),
+                        autoescape=select_autoescape(["html"]))
+confirmation_template = templates.get_template("email_template.html")
 
 
+class MailDispatcher:
+    """
+    Sends queued emails over a small pool of persistent, authenticated SMTP connections.
+
+    Each of the ``pool_size`` workers keeps one SMTP session open and sends up to ``batch_size`` queued messages
+    over it per wake-up. Temporary failures reconnect and retry with exponential backoff; permanent (5xx) errors
+    and messages that run out of retries are counted as failed and reported to the caller of :meth:`send`.
+    Idle sessions are closed after ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, hostname: str, port: int, username: str | None, password: str | None, start_tls: bool,
+                 use_tls: bool, validate_certs: bool, pool_size: int, batch_size: int, max_retries: int,
+                 retry_backoff: float, idle_timeout: float):
+        self.smtp_options = dict(hostname=hostname, port=port, username=username, password=password,
+                                 start_tls=start_tls, use_tls=use_tls, validate_certs=validate_certs)
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.queue: asyncio.Queue[tuple[EmailMessage, asyncio.Future | None]] = asyncio.Queue()
+        self.workers: list[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    @classmethod
+    def from_settings(cls) -> "MailDispatcher":
+        credentials = settings.mail_use_credentials
+        return cls(settings.mail_server, settings.mail_port,
+                   settings.mail_username if credentials else None, settings.mail_password if credentials else None,
+                   settings.mail_starttls, settings.mail_ssl_tls, settings.mail_validate_certs,
+                   settings.mail_pool_size, settings.mail_batch_size, settings.mail_max_retries,
+                   settings.mail_retry_backoff, settings.mail_idle_timeout)
+
+    def start(self) -> None:
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.pool_size)]
+
+    async def stop(self) -> None:
+        """
+        Waits for the queued messages to be sent, then closes the SMTP sessions.
+        """
+        if self.workers:
+            await self.queue.join()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def enqueue(self, message: EmailMessage) -> None:
+        self.start()
+        await self.queue.put((message, None))
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Queues a message and waits until it has been delivered.
+
+        :param message: The message to send.
+        :type message: EmailMessage
+        :raises aiosmtplib.SMTPException: If the message could not be delivered.
+        :raises ValueError: If the message has no recipients.
+        """
+        self.start()
+        delivered = asyncio.get_running_loop().create_future()
+        await self.queue.put((message, delivered))
+        await delivered
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "sent": self.sent, "failed": self.failed, "retries": self.retries}
+
+    async def _next_batch(self, smtp: aiosmtplib.SMTP) -> list[tuple[EmailMessage, asyncio.Future | None]]:
+        if smtp.is_connected:
+            try:
+                message = await asyncio.wait_for(self.queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await self._close(smtp)
+                message = await self.queue.get()
+        else:
+            message = await self.queue.get()
+        batch = [message]
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    @staticmethod
+    async def _close(smtp: aiosmtplib.SMTP) -> None:
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    @staticmethod
+    def _is_permanent(err: Exception) -> bool:
+        if isinstance(err, aiosmtplib.SMTPRecipientsRefused):
+            return True
+        return isinstance(err, aiosmtplib.SMTPResponseException) and err.code >= 500
+
+    async def _send(self, smtp: aiosmtplib.SMTP, message: EmailMessage) -> None:
+        attempt = 0
+        while True:
+            try:
+                if not smtp.is_connected:
+                    await smtp.connect()
+                await smtp.send_message(message)
+                self.sent += 1
+                return
+            except (aiosmtplib.SMTPException, OSError) as err:
+                if self._is_permanent(err) or attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                smtp.close()
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            except Exception:
+                # A message that cannot be sent at all, e.g. without recipients; retrying would not help.
+                self.failed += 1
+                raise
+
+    async def _worker(self) -> None:
+        smtp = aiosmtplib.SMTP(**self.smtp_options)
+        try:
+            while True:
+                try:
+                    batch = await self._next_batch(smtp)
+                except Exception as err:
+                    print(f"Error reading the email queue: {err}")
+                    continue
+                for message, delivered in batch:
+                    try:
+                        await self._send(smtp, message)
+                    except Exception as err:
+                        if delivered is None:
+                            print(f"Error sending email to {message['To']}: {err}")
+                        elif not delivered.done():
+                            # The traceback references this worker's frame; a caller clearing it would kill the worker.
+                            delivered.set_exception(err.with_traceback(None))
+                    else:
+                        if delivered is not None and not delivered.done():
+                            delivered.set_result(None)
+                    finally:
+                        self.queue.task_done()
+        finally:
+            if smtp.is_connected:
+                await self._close(smtp)
+
+
+mail_dispatcher = MailDispatcher.from_settings()
+
+
+def build_confirmation_email(email: EmailStr, username: str, host: str, token: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = "Confirm your email "
+    message["From"] = formataddr((settings.mail_from_name, settings.mail_from))
+    message["To"] = email
+    message.set_content(confirmation_template.render(host=host, username=username, token=token), subtype="html")
+    return message
+
+
+@job("send_email")
 async def send_email(email: EmailStr, username: str, host: str):
-    try:
-        token_verification = await auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(f"Error sending email: {err}")
+    token_verification = await auth_service.create_email_token({"sub": email})
+    await mail_dispatcher.send(build_confirmation_email(email, username, str(host), token_verification))
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable
+
+import redis.asyncio as redis
+from fastapi import Request, Response, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.redis_pool import redis_client
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an ``If-None-Match`` request header against the current ETag of a resource.
+
+    Comparison is weak, as required for ``If-None-Match``: ``W/"x"`` matches ``"x"``.
+
+    :param if_none_match: The value of the ``If-None-Match`` header.
+    :type if_none_match: str | None
+    :param etag: The current ETag.
+    :type etag: str
+    :return: Whether the client's cached copy is still current.
+    :rtype: bool
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
+
+
+ResponseLoader = Callable[[], Awaitable[tuple[bytes, dict[str, str]]]]
+
+
+class ResponseCache:
+    """
+    Versioned cache of serialized JSON responses, scoped per user.
+
+    Every user has a change counter in Redis that writes bump with :meth:`bump`. A response is stored together
+    with the version it was built from and is served, or answered with ``304 Not Modified``, only while that
+    version is current, so a write invalidates all the user's cached responses at once without deleting them.
+    Reading the version and the stored body takes one round trip. Counters start from the current time in
+    nanoseconds, so a counter lost to eviction never comes back with a value an old body was stored under.
+    """
+
+    def __init__(self, r: redis.Redis, prefix: str, ttl: int):
+        self.r = r
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def version_key(self, scope: int) -> str:
+        return f"{self.prefix}:version:{scope}"
+
+    def body_key(self, scope: int, key: str) -> str:
+        return f"{self.prefix}:response:{scope}:{key}"
+
+    @staticmethod
+    def etag(version: int, key: str) -> str:
+        return f'W/"{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+    async def bump(self, scope: int) -> None:
+        """
+        Invalidates every cached response of a user.
+
+        Redis errors are reported and swallowed: the write has already been committed, and the cached bodies
+        expire after ``ttl`` seconds.
+
+        :param scope: The ID of the user whose data changed.
+        :type scope: int
+        """
+        try:
+            async with self.r.pipeline(transaction=True) as pipe:
+                pipe.set(self.version_key(scope), time.time_ns(), nx=True)
+                pipe.incr(self.version_key(scope))
+                await pipe.execute()
+        except RedisError as err:
+            print(f"Error bumping cached responses version: {err}")
+
+    async def lookup(self, scope: int, key: str) -> tuple[int, bytes | None, dict[str, str]]:
+        """
+        Reads the current version of a user's data and the response stored for ``key``.
+
+        :param scope: The ID of the user.
+        :type scope: int
+        :param key: Identifies the response, usually the request path and query.
+        :type key: str
+        :return: The current version, and the stored body and headers, or None if none is stored for it.
+        :rtype: tuple[int, bytes | None, dict[str, str]]
+        """
+        version, stored = await self.r.mget(self.version_key(scope), self.body_key(scope, key))
+        if version is None:
+            version = time.time_ns()
+            if not await self.r.set(self.version_key(scope), version, nx=True):
+                # Another request created the version first; if it has already expired again, ours is as good.
+                version = await self.r.get(self.version_key(scope)) or version
+        version = int(version)
+        if stored is not None:
+            stored_version, headers, body = stored.split(b"\n", 2)
+            if int(stored_version) == version:
+                return version, body, json.loads(headers)
+        return version, None, {}
+
+    async def store(self, scope: int, key: str, version: int, body: bytes, headers: dict[str, str]) -> None:
+        value = b"%d\n%s\n%s" % (version, json.dumps(headers).encode(), body)
+        await self.r.set(self.body_key(scope, key), value, ex=self.ttl)
+
+    async def respond(self, request: Request, scope: int, load: ResponseLoader, key: str | None = None) -> Response:
+        """
+        Serves a JSON response from the cache, or builds and caches it.
+
+        Answers ``304 Not Modified`` when the client's ``If-None-Match`` holds the current ETag, without reading
+        the database or serializing anything. If Redis is unavailable the response is built without caching.
+
+        :param request: The request being served.
+        :type request: Request
+        :param scope: The ID of the user the response belongs to.
+        :type scope: int
+        :param load: Builds the serialized body and extra headers on a miss.
+        :type load: ResponseLoader
+        :param key: Identifies the response; defaults to the request path and query.
+        :type key: str | None
+        :return: The response.
+        :rtype: Response
+        """
+        key = key or f"{request.url.path}?{request.url.query}"
+        try:
+            version, body, headers = await self.lookup(scope, key)
+        except RedisError as err:
+            print(f"Error reading cached response: {err}")
+            body, headers = await load()
+            return Response(body, media_type="application/json", headers=headers)
+        etag = self.etag(version, key)
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        if body is None:
+            body, headers = await load()
+            try:
+                await self.store(scope, key, version, body, headers)
+            except RedisError as err:
+                print(f"Error caching response: {err}")
+        return Response(body, media_type="application/json", headers={**headers, **cache_headers})
+
+
+contacts_cache = ResponseCache(redis_client, prefix="contacts", ttl=settings.contacts_cache_ttl)
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.database.redis_pool import redis_client
+
+JobHandler = Callable[..., Awaitable[None]]
+
+
+class PermanentJobError(Exception):
+    """
+    Raised by a job handler for a failure that retrying cannot fix; the job is dead-lettered right away.
+    """
+
+handlers: dict[str, JobHandler] = {}
+
+
+def job(name: str):
+    """
+    Registers an async function as the handler of the jobs called ``name``.
+
+    :param name: The job name used with :meth:`JobQueue.enqueue`.
+    :type name: str
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        handlers[name] = func
+        return func
+    return decorator
+
+
+class JobQueue:
+    """
+    Durable job queue on Redis.
+
+    Jobs are JSON payloads pushed to a list. A worker atomically moves each job into its own processing list
+    (``BLMOVE``) and removes it only once the handler has finished, so jobs of a crashed worker are put back when
+    a worker with the same id starts again. Failed jobs are retried with exponential backoff through a sorted set
+    of delayed jobs and moved to a dead-letter list after ``max_attempts`` attempts, or at once when the handler
+    raises :class:`PermanentJobError`.
+    """
+    prefix = "jobs"
+
+    def __init__(self, r: redis.Redis, max_attempts: int, retry_backoff: float):
+        self.r = r
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.queue_key = f"{self.prefix}:queue"
+        self.delayed_key = f"{self.prefix}:delayed"
+        self.dead_key = f"{self.prefix}:dead"
+        self.stats_key = f"{self.prefix}:stats"
+
+    def processing_key(self, worker_id: str) -> str:
+        return f"{self.prefix}:processing:{worker_id}"
+
+    async def enqueue(self, name: str, *args, **kwargs) -> str:
+        """
+        Adds a job to the queue.
+
+        :param name: The name of a registered job handler.
+        :type name: str
+        :param args: Positional arguments for the handler, JSON serializable.
+        :param kwargs: Keyword arguments for the handler, JSON serializable.
+        :return: The job id.
+        :rtype: str
+        """
+        job_id = uuid.uuid4().hex
+        payload = json.dumps({"id": job_id, "name": name, "args": args, "kwargs": kwargs, "attempts": 0,
+                              "enqueued_at": time.time()})
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.lpush(self.queue_key, payload)
+            pipe.hincrby(self.stats_key, "enqueued", 1)
+            await pipe.execute()
+        return job_id
+
+    async def stats(self) -> dict:
+        """
+        Returns job counters and the current queue lengths.
+
+        :return: Enqueued/succeeded/retried/dead counters and the number of queued, delayed and dead jobs.
+        :rtype: dict
+        """
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.stats_key)
+            pipe.llen(self.queue_key)
+            pipe.zcard(self.delayed_key)
+            pipe.llen(self.dead_key)
+            counters, queued, delayed, dead = await pipe.execute()
+        stats = {key: 0 for key in ("enqueued", "succeeded", "retried", "dead")}
+        stats.update({(key.decode() if isinstance(key, bytes) else key): int(value) for key, value in counters.items()})
+        stats.update(queued=queued, delayed=delayed, dead_letter=dead)
+        return stats
+
+    async def promote_due(self) -> int:
+        """
+        Moves delayed jobs whose retry time has come back to the queue.
+
+        :return: The number of promoted jobs.
+        :rtype: int
+        """
+        promoted = 0
+        for payload in await self.r.zrangebyscore(self.delayed_key, "-inf", time.time()):
+            if await self.r.zrem(self.delayed_key, payload):
+                await self.r.lpush(self.queue_key, payload)
+                promoted += 1
+        return promoted
+
+    async def recover(self, worker_id: str) -> None:
+        """
+        Puts back jobs a previous run of this worker took but never finished.
+        """
+        while await self.r.lmove(self.processing_key(worker_id), self.queue_key, "RIGHT", "RIGHT"):
+            pass
+
+    async def process(self, worker_id: str, payload: bytes | str) -> None:
+        """
+        Runs one job taken from the queue and records the outcome.
+        """
+        try:
+            data = json.loads(payload)
+            job_id, name, args, kwargs = data["id"], data["name"], list(data["args"]), dict(data["kwargs"])
+            data["attempts"] = int(data.get("attempts", 0))
+        except (ValueError, TypeError, KeyError) as err:
+            # Left in the processing list, a payload that cannot be parsed would be put back on every restart.
+            async with self.r.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.processing_key(worker_id), 1, payload)
+                pipe.lpush(self.dead_key, payload)
+                pipe.hincrby(self.stats_key, "dead", 1)
+                await pipe.execute()
+            print(f"Malformed job dead-lettered: {err!r}")
+            return
+        handler = handlers.get(name)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job {name!r}")
+            await handler(*args, **kwargs)
+        except Exception as err:
+            data["attempts"] += 1
+            data["error"] = repr(err)
+            async with self.r.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.processing_key(worker_id), 1, payload)
+                if handler is not None and not isinstance(err, PermanentJobError) \
+                        and data["attempts"] < self.max_attempts:
+                    retry_at = time.time() + self.retry_backoff * 2 ** (data["attempts"] - 1)
+                    pipe.zadd(self.delayed_key, {json.dumps(data): retry_at})
+                    pipe.hincrby(self.stats_key, "retried", 1)
+                else:
+                    pipe.lpush(self.dead_key, json.dumps(data))
+                    pipe.hincrby(self.stats_key, "dead", 1)
+                await pipe.execute()
+            print(f"Job {name} {job_id} failed (attempt {data['attempts']}): {err!r}")
+        else:
+            async with self.r.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.processing_key(worker_id), 1, payload)
+                pipe.hincrby(self.stats_key, "succeeded", 1)
+                await pipe.execute()
+
+    async def run_worker(self, concurrency: int, worker_id: str | None = None, poll_timeout: float = 1.0,
+                         stop: asyncio.Event | None = None) -> None:
+        """
+        Takes and runs jobs, at most ``concurrency`` at a time, until ``stop`` is set.
+
+        :param concurrency: The maximum number of jobs running at once.
+        :type concurrency: int
+        :param worker_id: A stable id of this worker, defaults to the host name.
+        :type worker_id: str | None
+        :param poll_timeout: How long to block waiting for a job before checking for due retries.
+        :type poll_timeout: float
+        :param stop: Set to stop taking new jobs; running jobs are awaited.
+        :type stop: asyncio.Event | None
+        """
+        worker_id = worker_id or socket.gethostname()
+        stop = stop or asyncio.Event()
+        slots = asyncio.Semaphore(concurrency)
+        running: set[asyncio.Task] = set()
+        await self.recover(worker_id)
+        while not stop.is_set():
+            await slots.acquire()
+            await self.promote_due()
+            payload = await self.r.blmove(self.queue_key, self.processing_key(worker_id), poll_timeout,
+                                          "RIGHT", "LEFT")
+            if payload is None:
+                slots.release()
+                continue
+            task = asyncio.create_task(self.process(worker_id, payload))
+            running.add(task)
+            task.add_done_callback(lambda done: (running.discard(done), slots.release()))
+        await asyncio.gather(*running)
+
+
+job_queue = JobQueue(redis_client,
+                     max_attempts=settings.jobs_max_attempts, retry_backoff=settings.jobs_retry_backoff)
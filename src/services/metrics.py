@@ -0,0 +1,172 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from starlette.datastructures import MutableHeaders
+
+
+class Histogram:
+    """
+    Cumulative histogram of durations, in seconds.
+    """
+    buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "sum": self.total, "count": self.count}
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """
+    Work done while serving one request, filled in by the database and Redis hooks.
+    """
+    label: str = ""
+    queries: int = 0
+    db_seconds: float = 0.0
+    redis_seconds: float = 0.0
+    statements: dict[str, int] = field(default_factory=dict)
+
+    def server_timing(self, seconds: float) -> str:
+        return (f'app;dur={seconds * 1000:.2f}, db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries", '
+                f'redis;dur={self.redis_seconds * 1000:.2f}')
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class RequestMetrics:
+    """
+    Per-route request latency, SQL statement count, database time and Redis time.
+
+    Routes are labelled with their path template (``/api/contacts/{contact_id}``) so that the number of series
+    stays bounded; requests that matched no route are labelled ``unmatched``.
+    """
+
+    def __init__(self):
+        self.latency: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.requests: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.queries: dict[tuple[str, str], int] = defaultdict(int)
+        self.db_seconds: dict[tuple[str, str], float] = defaultdict(float)
+        self.redis_seconds: dict[tuple[str, str], float] = defaultdict(float)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        self.latency[key].observe(seconds)
+        self.requests[(method, route, status)] += 1
+        self.queries[key] += stats.queries
+        self.db_seconds[key] += stats.db_seconds
+        self.redis_seconds[key] += stats.redis_seconds
+
+    def render(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        :return: The exposition text.
+        :rtype: str
+        """
+        lines = ["# HELP http_request_duration_seconds Request latency by route.",
+                 "# TYPE http_request_duration_seconds histogram"]
+        for (method, route), histogram in sorted(self.latency.items()):
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)}"
+                             f" {count}")
+            lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {snapshot['sum']}")
+            lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} "
+                         f"{snapshot['count']}")
+        lines += ["# HELP http_requests_total Requests by route and status code.",
+                  "# TYPE http_requests_total counter"]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+        for name, help_text, values in (
+                ("http_request_db_queries_total", "SQL statements executed by route.", self.queries),
+                ("http_request_db_seconds_total", "Time spent executing SQL statements by route.", self.db_seconds),
+                ("http_request_redis_seconds_total", "Time spent on Redis commands by route.", self.redis_seconds)):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), value in sorted(values.items()):
+                lines.append(f"{name}{_labels(method=method, route=route)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def route_template(scope) -> str:
+    """
+    Returns the path template of the route that served a request, including the prefixes of included routers.
+
+    :param scope: The ASGI scope after routing.
+    :return: The template, such as ``/api/contacts/{contact_id}``, or ``unmatched``.
+    :rtype: str
+    """
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path_regex"):
+        return "unmatched"
+    path = scope["path"]
+    # Included routers may leave their prefix out of ``route.path``; find where the route's own match begins.
+    for index, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[index:]):
+            return path[:index] + route.path
+    return route.path
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that times each HTTP request and records it in :class:`RequestMetrics`.
+
+    The :class:`RequestStats` of the request is available through :data:`current_request` to the hooks that
+    count SQL statements and Redis time. With ``server_timing`` the totals up to the response headers are also
+    sent in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics, server_timing: bool = False):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(label=f"{scope['method']} {scope['path']}")
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing",
+                                                         stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            self.metrics.observe(scope["method"], route_template(scope), status, time.perf_counter() - started, stats)
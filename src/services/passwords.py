@@ -0,0 +1,95 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from src.conf.config import settings
+from src.services.metrics import Histogram
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.password_bcrypt_rounds)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded worker pool instead of on the event loop.
+
+    At most ``max_pending`` operations may be queued or running; further calls are rejected with
+    ``503 Service Unavailable`` so that a login storm cannot pile up unbounded work.
+    """
+
+    def __init__(self, executor: Executor, workers: int, max_pending: int):
+        self.executor = executor
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.rejected = 0
+        self.latency = Histogram()
+
+    @classmethod
+    def from_settings(cls) -> "PasswordHasher":
+        executor_class = ProcessPoolExecutor if settings.password_hash_executor == "process" else ThreadPoolExecutor
+        return cls(executor_class(max_workers=settings.password_hash_workers), settings.password_hash_workers,
+                   settings.password_hash_max_pending)
+
+    async def _run(self, func, *args):
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server is busy, try again",
+                                headers={"Retry-After": "1"})
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.latency.observe(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a password with the configured bcrypt cost.
+
+        :param password: The plain password.
+        :type password: str
+        :return: The password hash.
+        :rtype: str
+        """
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verifies a password and rehashes it if the stored hash uses an outdated scheme or cost.
+
+        :param plain_password: The plain password.
+        :type plain_password: str
+        :param hashed_password: The stored password hash.
+        :type hashed_password: str
+        :return: Whether the password matches, and the new hash to store or None.
+        :rtype: tuple[bool, str | None]
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.workers, 0),
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher.from_settings()
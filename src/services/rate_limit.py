@@ -0,0 +1,195 @@
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
+from starlette.datastructures import MutableHeaders
+
+from src.conf.config import settings
+from src.database.redis_pool import redis_client
+from src.services.auth import auth_service
+from src.services.cache import LRUCache, UserSnapshot
+
+# KEYS: the counters of the current and the previous window. ARGV: the limit, the window in seconds and the
+# share of the previous window that still overlaps the sliding window.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local count = math.floor(previous * tonumber(ARGV[3])) + current
+if count >= limit then
+    return {0, count}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+end
+return {1, count + 1}
+"""
+
+rate_limit_headers: ContextVar[dict | None] = ContextVar("rate_limit_headers", default=None)
+
+
+@dataclass(frozen=True, slots=True)
+class Policy:
+    """
+    At most ``limit`` requests in any ``window`` seconds.
+    """
+    limit: int
+    window: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Policy":
+        """
+        Parses a policy written as ``"<limit>/<window seconds>"``, e.g. ``"10/60"``.
+        """
+        limit, window = value.split("/")
+        return cls(limit=int(limit), window=int(window))
+
+
+@dataclass(slots=True)
+class Decision:
+    allowed: bool
+    policy: Policy
+    remaining: int
+    reset: int
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "RateLimit-Limit": str(self.policy.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+            "RateLimit-Policy": f"{self.policy.limit};w={self.policy.window}",
+        }
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limits shared by all workers through Redis.
+
+    Each policy counts requests per identity (a client address or a user) in fixed windows and weighs the
+    previous window by how much of it still overlaps the last ``window`` seconds. Checking and counting a request
+    is one script call. Every worker also counts the requests it let through in the current window: once that
+    alone reaches the limit, the shared count has too, and further requests are rejected without asking Redis.
+    When Redis is unavailable, requests are let through.
+    """
+
+    def __init__(self, r: redis.Redis, policies: dict[str, Policy], local_size: int):
+        self.r = r
+        self.policies = policies
+        self.local = LRUCache(maxsize=local_size, ttl=0)
+        self.script = r.register_script(SLIDING_WINDOW_SCRIPT)
+
+    @classmethod
+    def from_settings(cls, r: redis.Redis) -> "RateLimiter":
+        return cls(r, policies={name: Policy.parse(value) for name, value in settings.rate_limits.items()},
+                   local_size=settings.rate_limit_local_size)
+
+    async def hit(self, name: str, identity: str, now: float | None = None) -> Decision | None:
+        """
+        Counts a request against a policy.
+
+        :param name: The name of the policy.
+        :type name: str
+        :param identity: Whose requests are counted together.
+        :type identity: str
+        :param now: The current UNIX time.
+        :type now: float | None
+        :return: Whether the request is allowed, or None if the policy is not configured or Redis failed.
+        :rtype: Decision | None
+        """
+        policy = self.policies.get(name)
+        if policy is None:
+            return None
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now, policy.window)
+        reset = math.ceil(policy.window - elapsed)
+        key = f"{name}:{identity}"
+        local = self.local.get(key)
+        if local is not None and local[0] == window and local[1] >= policy.limit:
+            return Decision(allowed=False, policy=policy, remaining=0, reset=reset)
+        # The hash tag keeps both windows of a key in one Redis Cluster slot.
+        keys = [f"ratelimit:{{{key}}}:{int(window)}", f"ratelimit:{{{key}}}:{int(window) - 1}"]
+        try:
+            allowed, count = await self.script(keys=keys, args=[policy.limit, policy.window,
+                                                                1 - elapsed / policy.window], client=self.r)
+        except RedisError as err:
+            print(f"Error checking rate limit {name}: {err}")
+            return None
+        if allowed:
+            counted = local[1] + 1 if local is not None and local[0] == window else 1
+            self.local.set(key, (window, counted), ttl=reset)
+        return Decision(allowed=bool(allowed), policy=policy, remaining=max(policy.limit - count, 0), reset=reset)
+
+    async def check(self, name: str, identity: str) -> None:
+        """
+        Counts a request and rejects it with ``429 Too Many Requests`` when it is over the limit.
+
+        The ``RateLimit-*`` headers are added to the response by :class:`RateLimitHeadersMiddleware`.
+        """
+        decision = await self.hit(name, identity)
+        if decision is None:
+            return
+        headers = rate_limit_headers.get()
+        if headers is not None:
+            headers.update(decision.headers())
+        if not decision.allowed:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests",
+                                headers={"Retry-After": str(decision.reset)})
+
+
+rate_limiter = RateLimiter.from_settings(redis_client)
+
+
+def rate_limit(name: str):
+    """
+    Builds a dependency that limits requests per client address with the policy ``name`` of
+    ``settings.rate_limits``.
+    """
+    async def dependency(request: Request):
+        await rate_limiter.check(name, f"ip:{request.client.host if request.client else 'unknown'}")
+    return dependency
+
+
+def user_rate_limit(name: str):
+    """
+    Builds a dependency that limits requests per authenticated user with the policy ``name`` of
+    ``settings.rate_limits``.
+    """
+    async def dependency(current_user: UserSnapshot = Depends(auth_service.get_current_user)):
+        await rate_limiter.check(name, f"user:{current_user.id}")
+    return dependency
+
+
+class RateLimitHeadersMiddleware:
+    """
+    ASGI middleware that sends the ``RateLimit-*`` headers set by the rate limit dependencies of a route.
+
+    The headers are added here rather than by the dependencies because routes that return a response object
+    themselves drop the headers set on the injected ``Response``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {}
+        token = rate_limit_headers.set(headers)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and headers:
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers[name] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            rate_limit_headers.reset(token)
@@ -0,0 +1,88 @@
+import secrets
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.database.redis_pool import redis_client
+
+# KEYS[1]: the session hash. ARGV: the user, the presented token ID, the next token ID, the TTL in seconds.
+ROTATE_SCRIPT = """
+local current = redis.call('HMGET', KEYS[1], 'user', 'jti')
+if current[1] ~= ARGV[1] then
+    return 0
+end
+if current[2] ~= ARGV[2] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+class SessionStore:
+    """
+    Refresh-token sessions in Redis, one per login, so that every device has its own refresh-token family.
+
+    A session is a hash holding its user and the ID (``jti``) of the only refresh token that may be used next.
+    :meth:`rotate` swaps that ID for a new one in a single script call, so two concurrent refreshes with the same
+    token cannot both succeed. Presenting a token of the family that was already rotated away means it was
+    replayed, and ends the whole session. Sessions expire ``ttl`` seconds after their last rotation.
+    """
+
+    def __init__(self, r: redis.Redis, ttl: int):
+        self.r = r
+        self.ttl = ttl
+        self.rotate_script = r.register_script(ROTATE_SCRIPT)
+
+    @staticmethod
+    def key(sid: str) -> str:
+        return f"session:{sid}"
+
+    @staticmethod
+    def new_id() -> str:
+        return secrets.token_urlsafe(16)
+
+    async def create(self, email: str) -> tuple[str, str]:
+        """
+        Starts a session for a new login.
+
+        :param email: The email of the user.
+        :type email: str
+        :return: The session ID and the ID of its first refresh token.
+        :rtype: tuple[str, str]
+        """
+        sid, jti = self.new_id(), self.new_id()
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.hset(self.key(sid), mapping={"user": email, "jti": jti})
+            pipe.expire(self.key(sid), self.ttl)
+            await pipe.execute()
+        return sid, jti
+
+    async def rotate(self, sid: str, email: str, jti: str) -> str | None:
+        """
+        Exchanges the current refresh token of a session for the next one.
+
+        :param sid: The session ID from the refresh token.
+        :type sid: str
+        :param email: The user from the refresh token.
+        :type email: str
+        :param jti: The token ID from the refresh token.
+        :type jti: str
+        :return: The ID of the next refresh token, or None if the session has ended, does not belong to the user,
+            or the token was already used, in which case the session is ended.
+        :rtype: str | None
+        """
+        next_jti = self.new_id()
+        result = await self.rotate_script(keys=[self.key(sid)], args=[email, jti, next_jti, self.ttl],
+                                          client=self.r)
+        if result == -1:
+            print(f"Refresh token reused for session {sid} of {email}, session revoked")
+        return next_jti if result == 1 else None
+
+    async def revoke(self, sid: str) -> None:
+        await self.r.delete(self.key(sid))
+
+
+session_store = SessionStore(redis_client, ttl=settings.refresh_token_ttl)
@@ -0,0 +1,43 @@
+import base64
+import hashlib
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.jobs import PermanentJobError
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class TestStoreAvatar(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        from src.services.avatars import LocalAvatarStore
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = LocalAvatarStore(directory.name, [32], defer=True)
+        for target, value in (("avatar_uploader", self.store), ("SessionLocal", MagicMock())):
+            patcher = patch(f"src.services.avatars.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("src.services.avatars.repository_users.reset_avatar", AsyncMock())
+        self.reset_avatar = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_undecodable_image_resets_avatar(self):
+        from src.services.avatars import store_avatar
+
+        # Passes the signature sniff but cannot be decoded.
+        data = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+        with self.assertRaises(PermanentJobError):
+            await store_avatar(base64.b64encode(data).decode())
+        self.reset_avatar.assert_awaited_once()
+        self.assertEqual(self.reset_avatar.await_args.args[0], self.store.url(hashlib.sha256(data).hexdigest()))
+
+
+if __name__ == "__main__":
+    unittest.main()
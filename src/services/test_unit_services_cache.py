@@ -0,0 +1,249 @@
+import asyncio
+import pickle
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.database.models import User
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from fastapi import HTTPException
+
+from src.services.auth import Auth
+from src.services.cache import LRUCache, TokenCache, UserCache, UserSnapshot
+
+
+class TestUserSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.user = User(id=7, email="user@example.com", username="user123", avatar="https://example.com/a.png",
+                         confirmed=True, created_at=datetime(2024, 1, 2, 3, 4, 5))
+
+    def test_round_trip(self):
+        snapshot = UserSnapshot.from_user(self.user)
+        result = UserSnapshot.loads(snapshot.dumps())
+        self.assertEqual(result, snapshot)
+        self.assertEqual(result.created_at, self.user.created_at)
+
+    def test_round_trip_without_optional_fields(self):
+        user = User(id=1, email="user@example.com", username=None, avatar=None, confirmed=None, created_at=None)
+        result = UserSnapshot.loads(UserSnapshot.from_user(user).dumps())
+        self.assertIsNone(result.avatar)
+        self.assertFalse(result.confirmed)
+
+    def test_loads_other_version(self):
+        payload = UserSnapshot.from_user(self.user).dumps().replace(b"[1,", b"[2,", 1)
+        self.assertIsNone(UserSnapshot.loads(payload))
+
+    def test_loads_legacy_pickle(self):
+        self.assertIsNone(UserSnapshot.loads(pickle.dumps({"email": "user@example.com"})))
+
+    def test_loads_malformed_created_at(self):
+        self.assertIsNone(UserSnapshot.loads(b'[1,7,"user@example.com",null,null,true,"yesterday"]'))
+        self.assertIsNone(UserSnapshot.loads(b'[1,7,"user@example.com",null,null,true,20240102]'))
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_expires_entries(self):
+        cache = LRUCache(maxsize=2, ttl=10)
+        with patch("src.services.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("src.services.cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_per_entry_ttl(self):
+        cache = LRUCache(maxsize=2, ttl=10)
+        with patch("src.services.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1, ttl=60)
+        with patch("src.services.cache.time.monotonic", return_value=150.0):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("src.services.cache.time.monotonic", return_value=160.0):
+            self.assertIsNone(cache.get("a"))
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = MagicMock()
+        self.redis.get = AsyncMock(return_value=None)
+        self.redis.set = AsyncMock()
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock()
+        self.redis.pipeline.return_value.__aenter__.return_value = self.pipe
+        self.cache = UserCache(self.redis, ttl=900, local_ttl=30, local_size=8)
+        self.user = UserSnapshot(id=7, email="user@example.com", username="user123", avatar=None, confirmed=True,
+                                 created_at=None)
+
+    async def test_get_from_local_tier(self):
+        await self.cache.set(self.user)
+        result = await self.cache.get(self.user.email)
+        self.assertEqual(result, self.user)
+        self.redis.get.assert_not_called()
+        self.redis.set.assert_awaited_once_with("user:user@example.com", self.user.dumps(), ex=900)
+
+    async def test_get_from_redis_fills_local_tier(self):
+        self.redis.get.return_value = self.user.dumps()
+        self.assertEqual(await self.cache.get(self.user.email), self.user)
+        self.assertEqual(await self.cache.get(self.user.email), self.user)
+        self.redis.get.assert_awaited_once()
+
+    async def test_invalidate(self):
+        await self.cache.set(self.user)
+        await self.cache.invalidate(self.user.email)
+        self.assertIsNone(self.cache.local.get(self.user.email))
+        self.pipe.delete.assert_called_once_with("user:user@example.com")
+        self.pipe.publish.assert_called_once_with(UserCache.channel, self.user.email)
+        self.pipe.execute.assert_awaited_once()
+
+
+async def wait_until(condition, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+class TestUserCacheListener(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeServer()
+        self.redis = FakeAsyncRedis(server=self.server)
+        self.cache = UserCache(self.redis, ttl=900, local_ttl=30, local_size=8)
+        self.user = UserSnapshot(id=7, email="user@example.com", username="user123", avatar=None, confirmed=True,
+                                 created_at=None)
+        self.listener = asyncio.create_task(self.cache.listen(retry_backoff=0.01))
+        await wait_until(lambda: self.server.subscribers.get(UserCache.channel.encode()))
+        # Let the listener clear the local tier after its first subscription before the test fills it.
+        await asyncio.sleep(0.05)
+
+    async def asyncTearDown(self):
+        self.listener.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await self.listener
+        await self.redis.aclose()
+
+    async def test_reconnects_and_clears_local_tier(self):
+        self.cache.local.set(self.user.email, self.user)
+        with patch("builtins.print") as printed:
+            self.server.connected = False
+            await wait_until(lambda: printed.called)
+            self.server.connected = True
+        # Invalidations published while disconnected are lost, so resubscribing drops the whole local tier.
+        await wait_until(lambda: self.cache.local.get(self.user.email) is None)
+
+        self.cache.local.set(self.user.email, self.user)
+        await self.redis.publish(UserCache.channel, self.user.email)
+        await wait_until(lambda: self.cache.local.get(self.user.email) is None)
+
+
+class TestTokenCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        self.cache = TokenCache(self.redis, maxsize=8)
+        self.digest = TokenCache.digest("header.payload.signature")
+        self.claims = {"sub": "user@example.com", "scope": "access_token", "exp": time.time() + 900}
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    def test_digest(self):
+        self.assertEqual(len(self.digest), 32)
+        self.assertEqual(self.digest, TokenCache.digest("header.payload.signature"))
+        self.assertNotEqual(self.digest, TokenCache.digest("header.payload.other"))
+
+    def test_set_until_exp(self):
+        self.cache.set(self.digest, self.claims)
+        self.assertEqual(self.cache.get(self.digest), self.claims)
+        with patch("src.services.cache.time.monotonic", return_value=time.monotonic() + 901):
+            self.assertIsNone(self.cache.get(self.digest))
+
+    def test_set_skips_expired(self):
+        self.cache.set(self.digest, {**self.claims, "exp": time.time() - 1})
+        self.cache.set(TokenCache.digest("no-exp"), {"sub": "user@example.com"})
+        self.assertEqual(len(self.cache.local), 0)
+
+    async def test_revoke(self):
+        self.cache.set(self.digest, self.claims)
+        self.assertFalse(await self.cache.is_revoked(self.digest))
+        await self.cache.revoke(self.digest, self.claims["exp"])
+        self.assertIsNone(self.cache.get(self.digest))
+        self.assertTrue(await self.cache.is_revoked(self.digest))
+        self.assertGreater(await self.redis.ttl(TokenCache.deny_key(self.digest)), 890)
+
+    async def test_revoke_expired(self):
+        await self.cache.revoke(self.digest, time.time() - 10)
+        self.assertFalse(await self.cache.is_revoked(self.digest))
+
+
+class TestTokenCacheListener(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeServer()
+        self.redis = FakeAsyncRedis(server=self.server)
+        self.auth = Auth()
+        self.auth.tokens = TokenCache(self.redis, maxsize=8)
+        self.auth.cache = MagicMock()
+        self.auth.cache.get = AsyncMock(return_value=UserSnapshot(
+            id=7, email="user@example.com", username="user123", avatar=None, confirmed=True, created_at=None))
+        self.listener = asyncio.create_task(self.auth.tokens.listen(retry_backoff=0.01))
+        await wait_until(lambda: self.server.subscribers.get(TokenCache.channel.encode()))
+        await asyncio.sleep(0.05)
+
+    async def asyncTearDown(self):
+        self.listener.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await self.listener
+        await self.redis.aclose()
+
+    async def test_revocation_missed_while_disconnected_is_enforced(self):
+        token = await self.auth.create_access_token(data={"sub": "user@example.com"})
+        digest = TokenCache.digest(token)
+        await self.auth.get_current_user(token, db=None)
+        self.assertIsNotNone(self.auth.tokens.get(digest))
+
+        with patch("builtins.print") as printed:
+            self.server.connected = False
+            await wait_until(lambda: printed.called)
+            self.server.connected = True
+        # Another worker revoked the token while this one was not subscribed, so the message never arrived.
+        await self.redis.set(TokenCache.deny_key(digest), 1, ex=900)
+        await wait_until(lambda: self.auth.tokens.get(digest) is None)
+
+        with self.assertRaises(HTTPException) as caught:
+            await self.auth.get_current_user(token, db=None)
+        self.assertEqual(caught.exception.status_code, 401)
+        self.assertIsNone(self.auth.tokens.get(digest))
+
+    async def test_revocation_racing_the_first_decode_is_enforced(self):
+        token = await self.auth.create_access_token(data={"sub": "user@example.com"})
+        digest = TokenCache.digest(token)
+        is_revoked = self.auth.tokens.is_revoked
+
+        async def revoked_after_check(checked: str) -> bool:
+            result = await is_revoked(checked)
+            # Another worker revokes the token right after the deny list was read and its eviction is delivered
+            # before this request resumes.
+            await self.redis.set(TokenCache.deny_key(checked), 1, ex=900)
+            self.auth.tokens.pop(checked)
+            return result
+
+        self.auth.tokens.is_revoked = revoked_after_check
+        await self.auth.get_current_user(token, db=None)
+        self.assertIsNone(self.auth.tokens.get(digest))
+
+        self.auth.tokens.is_revoked = is_revoked
+        with self.assertRaises(HTTPException):
+            await self.auth.get_current_user(token, db=None)
+
+
+if __name__ == "__main__":
+    unittest.main()
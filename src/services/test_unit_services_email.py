@@ -0,0 +1,95 @@
+import socket
+import unittest
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+from src.services.email import MailDispatcher, build_confirmation_email
+
+
+class RecordingHandler:
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.responses:
+            return self.responses.pop(0)
+        self.messages.append((session.peer, envelope.rcpt_tos, envelope.content.decode()))
+        return "250 OK"
+
+
+class TestMailDispatcher(unittest.IsolatedAsyncioTestCase):
+    def start_server(self, handler):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+        return MailDispatcher(hostname="127.0.0.1", port=port,
+                              username=None, password=None, start_tls=False, use_tls=False, validate_certs=False,
+                              pool_size=1, batch_size=10, max_retries=2, retry_backoff=0.01, idle_timeout=5)
+
+    async def test_sends_queued_messages_over_one_session(self):
+        handler = RecordingHandler()
+        dispatcher = self.start_server(handler)
+        for index in range(3):
+            await dispatcher.enqueue(build_confirmation_email(f"user{index}@example.com", f"user{index}",
+                                                              "http://testserver/", "token"))
+        await dispatcher.stop()
+
+        self.assertEqual([rcpt for _, rcpt, _ in handler.messages],
+                         [["user0@example.com"], ["user1@example.com"], ["user2@example.com"]])
+        self.assertEqual(len({peer for peer, _, _ in handler.messages}), 1)
+        self.assertIn("http://testserver/api/auth/confirmed_email/token", handler.messages[0][2])
+        self.assertEqual(dispatcher.stats(), {"queued": 0, "sent": 3, "failed": 0, "retries": 0})
+
+    async def test_retries_temporary_failures(self):
+        handler = RecordingHandler(responses=["451 Try again later"])
+        dispatcher = self.start_server(handler)
+        await dispatcher.enqueue(build_confirmation_email("user@example.com", "user", "http://testserver/", "t"))
+        await dispatcher.stop()
+
+        self.assertEqual(len(handler.messages), 1)
+        self.assertEqual(dispatcher.stats()["retries"], 1)
+
+    async def test_drops_permanent_failures(self):
+        handler = RecordingHandler(responses=["550 Mailbox unavailable"])
+        dispatcher = self.start_server(handler)
+        await dispatcher.enqueue(build_confirmation_email("user@example.com", "user", "http://testserver/", "t"))
+        await dispatcher.stop()
+
+        self.assertEqual(handler.messages, [])
+        self.assertEqual(dispatcher.stats(), {"queued": 0, "sent": 0, "failed": 1, "retries": 0})
+
+
+    async def test_send_waits_for_delivery(self):
+        handler = RecordingHandler(responses=["550 Mailbox unavailable"])
+        dispatcher = self.start_server(handler)
+        message = build_confirmation_email("user@example.com", "user", "http://testserver/", "t")
+        with self.assertRaises(aiosmtplib.SMTPException):
+            await dispatcher.send(message)
+        await dispatcher.send(message)
+        await dispatcher.stop()
+
+        self.assertEqual(len(handler.messages), 1)
+
+    async def test_survives_unexpected_errors(self):
+        handler = RecordingHandler()
+        dispatcher = self.start_server(handler)
+        message = build_confirmation_email("user@example.com", "user", "http://testserver/", "t")
+        no_recipients = build_confirmation_email("user@example.com", "user", "http://testserver/", "t")
+        del no_recipients["To"]
+        await dispatcher.enqueue(no_recipients)
+        with self.assertRaises(ValueError):
+            await dispatcher.send(no_recipients)
+        await dispatcher.send(message)
+        await dispatcher.stop()
+
+        self.assertEqual(len(handler.messages), 1)
+        self.assertEqual(dispatcher.stats(), {"queued": 0, "sent": 1, "failed": 2, "retries": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
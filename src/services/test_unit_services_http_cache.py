@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+
+from src.services.http_cache import ResponseCache, etag_matches
+
+
+def make_request(path: str, if_none_match: str | None = None):
+    request = MagicMock()
+    request.url.path = path
+    request.url.query = ""
+    request.headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return request
+
+
+class TestEtagMatches(unittest.TestCase):
+    def test_weak_comparison(self):
+        self.assertTrue(etag_matches('"a", W/"b"', 'W/"b"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches(None, '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cache = ResponseCache(FakeAsyncRedis(), prefix="test", ttl=60)
+        self.load = AsyncMock(return_value=(b'[{"id": 1}]', {"X-Next-Cursor": "abc"}))
+
+    async def test_serves_stored_body_until_bump(self):
+        first = await self.cache.respond(make_request("/items"), 7, self.load)
+        second = await self.cache.respond(make_request("/items"), 7, self.load)
+        self.assertEqual(self.load.await_count, 1)
+        self.assertEqual(second.body, b'[{"id": 1}]')
+        self.assertEqual(second.headers["X-Next-Cursor"], "abc")
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+
+        await self.cache.bump(7)
+        third = await self.cache.respond(make_request("/items"), 7, self.load)
+        self.assertEqual(self.load.await_count, 2)
+        self.assertNotEqual(third.headers["ETag"], first.headers["ETag"])
+
+    async def test_not_modified(self):
+        first = await self.cache.respond(make_request("/items"), 7, self.load)
+        response = await self.cache.respond(make_request("/items", first.headers["ETag"]), 7, self.load)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b"")
+        self.assertEqual(self.load.await_count, 1)
+
+    async def test_users_and_keys_are_separate(self):
+        await self.cache.respond(make_request("/items"), 7, self.load)
+        await self.cache.respond(make_request("/items"), 8, self.load)
+        await self.cache.respond(make_request("/other"), 7, self.load)
+        await self.cache.bump(8)
+        await self.cache.respond(make_request("/items"), 7, self.load)
+        self.assertEqual(self.load.await_count, 3)
+
+    async def test_version_expires_while_created(self):
+        self.cache.r = MagicMock()
+        self.cache.r.mget = AsyncMock(return_value=[None, None])
+        self.cache.r.set = AsyncMock(return_value=None)
+        self.cache.r.get = AsyncMock(return_value=None)
+        response = await self.cache.respond(make_request("/items"), 7, self.load)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response.headers)
+
+    async def test_redis_unavailable(self):
+        self.cache.r = MagicMock()
+        self.cache.r.mget = AsyncMock(side_effect=ConnectionError("down"))
+        response = await self.cache.respond(make_request("/items"), 7, self.load)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from fakeredis import FakeAsyncRedis
+
+from src.services import jobs
+from src.services.jobs import JobQueue, PermanentJobError, job
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = FakeAsyncRedis()
+        self.queue = JobQueue(self.redis, max_attempts=2, retry_backoff=0)
+        self.calls = []
+        patcher = patch.dict(jobs.handlers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        @job("record")
+        async def record(value, suffix=""):
+            self.calls.append(value + suffix)
+
+        @job("fail")
+        async def fail():
+            raise ValueError("boom")
+
+        @job("reject")
+        async def reject():
+            raise PermanentJobError("bad input")
+
+    async def run_worker(self):
+        stop = asyncio.Event()
+        worker = asyncio.create_task(self.queue.run_worker(concurrency=2, worker_id="test", poll_timeout=0.05,
+                                                           stop=stop))
+        for _ in range(100):
+            stats = await self.queue.stats()
+            if stats["queued"] == 0 and stats["delayed"] == 0 and not await self.redis.llen("jobs:processing:test"):
+                break
+            await asyncio.sleep(0.01)
+        stop.set()
+        await worker
+
+    async def test_runs_enqueued_jobs(self):
+        await self.queue.enqueue("record", "a")
+        await self.queue.enqueue("record", "b", suffix="!")
+        await self.run_worker()
+
+        self.assertEqual(sorted(self.calls), ["a", "b!"])
+        stats = await self.queue.stats()
+        self.assertEqual((stats["enqueued"], stats["succeeded"], stats["dead"]), (2, 2, 0))
+
+    async def test_retries_then_dead_letters(self):
+        await self.queue.enqueue("fail")
+        await self.run_worker()
+
+        stats = await self.queue.stats()
+        self.assertEqual((stats["retried"], stats["dead"], stats["dead_letter"]), (1, 1, 1))
+        dead = json.loads(await self.redis.lindex("jobs:dead", 0))
+        self.assertEqual((dead["name"], dead["attempts"]), ("fail", 2))
+        self.assertIn("boom", dead["error"])
+
+    async def test_permanent_failure_is_not_retried(self):
+        await self.queue.enqueue("reject")
+        await self.run_worker()
+
+        stats = await self.queue.stats()
+        self.assertEqual((stats["retried"], stats["dead"]), (0, 1))
+        dead = json.loads(await self.redis.lindex("jobs:dead", 0))
+        self.assertEqual(dead["attempts"], 1)
+
+    async def test_malformed_payload_is_dead_lettered(self):
+        for payload in (b"not json", json.dumps({"id": "1", "args": []}), json.dumps(["record"]),
+                        json.dumps({"name": "record", "args": ["no id"], "kwargs": {}}),
+                        json.dumps({"id": "2", "name": "record", "args": ["bad"], "kwargs": {}, "attempts": "x"})):
+            await self.redis.lpush("jobs:queue", payload)
+        await self.queue.enqueue("record", "ok")
+        await self.run_worker()
+
+        self.assertEqual(self.calls, ["ok"])
+        self.assertEqual(await self.redis.llen("jobs:processing:test"), 0)
+        self.assertEqual((await self.queue.stats())["dead_letter"], 5)
+        self.assertIn(b"not json", await self.redis.lrange("jobs:dead", 0, -1))
+
+    async def test_unknown_job_is_dead_lettered(self):
+        await self.queue.enqueue("missing")
+        await self.run_worker()
+        self.assertEqual((await self.queue.stats())["dead"], 1)
+
+    async def test_recovers_unfinished_jobs(self):
+        await self.redis.lpush("jobs:processing:test", json.dumps({"id": "1", "name": "record", "args": ["x"],
+                                                                   "kwargs": {}, "attempts": 0}))
+        await self.run_worker()
+        self.assertEqual(self.calls, ["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.services.metrics import RequestMetrics, RequestMetricsMiddleware, current_request
+
+
+class TestRequestMetricsMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.metrics = RequestMetrics()
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def read_item(item_id: int):
+            stats = current_request.get()
+            stats.queries += 2
+            stats.db_seconds += 0.004
+            return {"id": item_id}
+
+        app.add_middleware(RequestMetricsMiddleware, metrics=self.metrics, server_timing=True)
+        self.client = TestClient(app)
+
+    def test_records_route_template(self):
+        self.client.get("/items/1")
+        self.client.get("/items/2")
+        self.client.get("/missing")
+
+        self.assertEqual(self.metrics.latency[("GET", "/items/{item_id}")].count, 2)
+        self.assertEqual(self.metrics.queries[("GET", "/items/{item_id}")], 4)
+        self.assertEqual(self.metrics.requests[("GET", "unmatched", 404)], 1)
+
+    def test_server_timing_header(self):
+        response = self.client.get("/items/1")
+
+        timing = response.headers["Server-Timing"]
+        self.assertTrue(timing.startswith("app;dur="))
+        self.assertIn('db;dur=4.00;desc="2 queries"', timing)
+
+    def test_render_prometheus_text(self):
+        self.client.get("/items/1")
+
+        text = self.metrics.render()
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",le="+Inf"} 1\n',
+                      text)
+        self.assertIn('http_requests_total{method="GET",route="/items/{item_id}",status="200"} 1\n', text)
+        self.assertIn('http_request_db_queries_total{method="GET",route="/items/{item_id}"} 2\n', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
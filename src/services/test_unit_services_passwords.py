@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.services.passwords import PasswordHasher
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(ThreadPoolExecutor(max_workers=2), workers=2, max_pending=2)
+        self.addCleanup(self.hasher.shutdown)
+        patcher = patch("src.services.passwords.pwd_context",
+                        CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4))
+        self.context = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_hash_and_verify(self):
+        hashed = await self.hasher.hash("secret")
+        self.assertEqual(await self.hasher.verify_and_update("secret", hashed), (True, None))
+        self.assertEqual(await self.hasher.verify_and_update("wrong", hashed), (False, None))
+        stats = self.hasher.stats()
+        self.assertEqual(stats["latency_seconds"]["count"], 3)
+        self.assertEqual(stats["in_flight"], 0)
+
+    async def test_rehash_when_cost_changes(self):
+        hashed = await self.hasher.hash("secret")
+        with patch("src.services.passwords.pwd_context",
+                   CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)):
+            verified, new_hash = await self.hasher.verify_and_update("secret", hashed)
+        self.assertTrue(verified)
+        self.assertTrue(new_hash.startswith("$2b$05$"))
+
+    async def test_rejects_when_full(self):
+        results = await asyncio.gather(*(self.hasher.hash("secret") for _ in range(3)), return_exceptions=True)
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(rejected[0].status_code, 503)
+        self.assertEqual(self.hasher.stats()["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
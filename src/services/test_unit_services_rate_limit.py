@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+
+from src.services.rate_limit import Policy, RateLimiter
+
+
+class TestPolicy(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(Policy.parse("10/60"), Policy(limit=10, window=60))
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        self.limiter = RateLimiter(self.redis, policies={"login": Policy(limit=3, window=60)}, local_size=16)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_allows_up_to_limit(self):
+        decisions = [await self.limiter.hit("login", "ip:1", now=6000.0) for _ in range(4)]
+        self.assertEqual([decision.allowed for decision in decisions], [True, True, True, False])
+        self.assertEqual([decision.remaining for decision in decisions], [2, 1, 0, 0])
+        self.assertEqual(decisions[0].reset, 60)
+        self.assertEqual(decisions[0].headers(), {"RateLimit-Limit": "3", "RateLimit-Remaining": "2",
+                                                  "RateLimit-Reset": "60", "RateLimit-Policy": "3;w=60"})
+
+    async def test_identities_are_independent(self):
+        for _ in range(3):
+            await self.limiter.hit("login", "ip:1", now=6000.0)
+        self.assertTrue((await self.limiter.hit("login", "ip:2", now=6000.0)).allowed)
+
+    async def test_previous_window_slides_out(self):
+        for _ in range(3):
+            await self.limiter.hit("login", "ip:1", now=6050.0)
+        # A third of the previous window overlaps: floor(3 * 40 / 60) = 2 requests still count.
+        decision = await self.limiter.hit("login", "ip:1", now=6080.0)
+        self.assertTrue(decision.allowed)
+        self.assertEqual(decision.remaining, 0)
+        self.assertFalse((await self.limiter.hit("login", "ip:1", now=6080.0)).allowed)
+        self.assertTrue((await self.limiter.hit("login", "ip:1", now=6110.0)).allowed)
+
+    async def test_local_precheck_skips_redis(self):
+        for _ in range(3):
+            await self.limiter.hit("login", "ip:1", now=6000.0)
+        self.limiter.script = AsyncMock()
+        decision = await self.limiter.hit("login", "ip:1", now=6001.0)
+        self.assertFalse(decision.allowed)
+        self.limiter.script.assert_not_called()
+
+    async def test_unknown_policy(self):
+        self.assertIsNone(await self.limiter.hit("signup", "ip:1"))
+
+    async def test_redis_error_allows(self):
+        self.limiter.script = MagicMock(side_effect=ConnectionError("down"))
+        self.assertIsNone(await self.limiter.hit("login", "ip:1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from fakeredis import FakeAsyncRedis
+
+from src.services.sessions import SessionStore
+
+
+class TestSessionStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        self.store = SessionStore(self.redis, ttl=3600)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_create(self):
+        sid, jti = await self.store.create("user@example.com")
+        key = SessionStore.key(sid)
+        self.assertEqual(await self.redis.hgetall(key), {b"user": b"user@example.com", b"jti": jti.encode()})
+        self.assertGreater(await self.redis.ttl(key), 3590)
+
+    async def test_rotate(self):
+        sid, jti = await self.store.create("user@example.com")
+        await self.redis.expire(SessionStore.key(sid), 10)
+        next_jti = await self.store.rotate(sid, "user@example.com", jti)
+        self.assertIsNotNone(next_jti)
+        self.assertNotEqual(next_jti, jti)
+        self.assertEqual(await self.redis.hget(SessionStore.key(sid), "jti"), next_jti.encode())
+        self.assertGreater(await self.redis.ttl(SessionStore.key(sid)), 3590)
+
+    async def test_rotate_reused_token_revokes_session(self):
+        sid, jti = await self.store.create("user@example.com")
+        next_jti = await self.store.rotate(sid, "user@example.com", jti)
+        self.assertIsNone(await self.store.rotate(sid, "user@example.com", jti))
+        self.assertFalse(await self.redis.exists(SessionStore.key(sid)))
+        self.assertIsNone(await self.store.rotate(sid, "user@example.com", next_jti))
+
+    async def test_rotate_other_user(self):
+        sid, jti = await self.store.create("user@example.com")
+        self.assertIsNone(await self.store.rotate(sid, "other@example.com", jti))
+        self.assertTrue(await self.redis.exists(SessionStore.key(sid)))
+
+    async def test_rotate_unknown_session(self):
+        self.assertIsNone(await self.store.rotate("missing", "user@example.com", "jti"))
+
+    async def test_revoke(self):
+        sid, jti = await self.store.create("user@example.com")
+        await self.store.revoke(sid)
+        self.assertIsNone(await self.store.rotate(sid, "user@example.com", jti))
+
+
+if __name__ == "__main__":
+    unittest.main()
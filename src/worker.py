@@ -0,0 +1,41 @@
+"""
+Background job worker.
+
+Runs the jobs enqueued by the web processes (confirmation emails, avatar thumbnails)::
+
+    python -m src.worker --concurrency 10
+"""
+import argparse
+import asyncio
+import signal
+
+from src.conf.config import settings
+from src.database.redis_pool import open_redis, close_redis
+from src.services import avatars, email  # noqa: F401 - registers the job handlers
+from src.services.email import mail_dispatcher
+from src.services.jobs import job_queue
+
+
+async def run(concurrency: int, worker_id: str | None) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await open_redis()
+    try:
+        await job_queue.run_worker(concurrency, worker_id, stop=stop)
+    finally:
+        await mail_dispatcher.stop()
+        await close_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.jobs_concurrency)
+    parser.add_argument("--worker-id", default=None, help="stable id used to recover unfinished jobs on restart")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.worker_id))
+
+
+if __name__ == "__main__":
+    main()
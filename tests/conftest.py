@@ -1,18 +1,34 @@
+from contextlib import contextmanager
+from pathlib import Path
+
 import pytest
+from alembic import command
+from alembic.config import Config
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from main import app
-from src.database.models import Base
-from src.database.db import get_db
+from src.database.models import Base, User
+from src.database.db import get_db, instrument_engine
+from src.database.diagnostics import count_queries
+from src.services.auth import auth_service
+from src.services.cache import UserSnapshot
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+instrument_engine(async_engine)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False,
+                                              expire_on_commit=False)
+
 
 @pytest.fixture(scope="module")
 def session():
@@ -29,11 +45,9 @@ def session():
 @pytest.fixture(scope="module")
 def client(session):
 
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
 
@@ -43,3 +57,57 @@ def client(session):
 @pytest.fixture(scope="module")
 def user():
     return {'username': 'max123', 'email': 'max123@example.com', 'password': '123456789'}
+
+
+@pytest.fixture(scope="module")
+def current_user(client, session, user):
+    """
+    Stores the test user and signs every request of the module in as that user.
+    """
+    db_user = User(username=user["username"], email=user["email"], password="hashed", confirmed=True, avatar="")
+    session.add(db_user)
+    session.commit()
+    snapshot = UserSnapshot.from_user(db_user)
+    app.dependency_overrides[auth_service.get_current_user] = lambda: snapshot
+    yield snapshot
+    app.dependency_overrides.pop(auth_service.get_current_user)
+
+
+@pytest.fixture
+def max_queries():
+    """
+    Fails the test if the block runs more SQL statements than allowed::
+
+        with max_queries(1):
+            client.get("/api/contacts/")
+    """
+    @contextmanager
+    def check(limit: int):
+        with count_queries(async_engine) as statements:
+            yield
+        assert len(statements) <= limit, f"{len(statements)} queries, expected at most {limit}:\n" + \
+            "\n".join(statements)
+    return check
+
+
+@pytest.fixture(scope="session")
+def alembic_config():
+    """
+    Builds the Alembic configuration of the project for a database URL.
+    """
+    def build(url: str) -> Config:
+        config = Config(str(Path(__file__).resolve().parent.parent / "alembic.ini"))
+        config.set_main_option("sqlalchemy.url", url)
+        config.attributes["configure_logger"] = False
+        return config
+    return build
+
+
+@pytest.fixture(scope="module")
+def migrated_database(tmp_path_factory, alembic_config):
+    """
+    Path of a scratch SQLite database upgraded to the latest migration.
+    """
+    path = tmp_path_factory.mktemp("migrations") / "migrated.db"
+    command.upgrade(alembic_config(f"sqlite+aiosqlite:///{path}"), "head")
+    return path
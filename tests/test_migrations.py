@@ -0,0 +1,35 @@
+import sqlite3
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+
+from src.database.models import Base
+
+
+def test_migrations_match_models(migrated_database):
+    engine = create_engine(f"sqlite:///{migrated_database}")
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+    engine.dispose()
+
+
+def test_backfills_birthday_key_and_downgrades(tmp_path, alembic_config):
+    path = tmp_path / "legacy.db"
+    config = alembic_config(f"sqlite+aiosqlite:///{path}")
+    command.upgrade(config, "0001")
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO users (id, email, password) VALUES (1, 'user@example.com', 'x')")
+        conn.executemany("INSERT INTO contacts (name, surname, email, phone_number, birthday, user_id) "
+                         "VALUES (?, 'Franko', ?, '0', ?, 1)",
+                         [("Ivan", "ivan@example.com", "1992-02-29"), ("Lesia", "lesia@example.com", None)])
+
+    command.upgrade(config, "head")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT name, birthday_key FROM contacts ORDER BY id").fetchall() == \
+            [("Ivan", 229), ("Lesia", None)]
+
+    command.downgrade(config, "base")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'contacts'").fetchall() == []
@@ -0,0 +1,80 @@
+"""
+Checks that every repository query reaches its rows through an index.
+
+The queries are captured while the repository functions run against a database built by the migrations, and
+each one is explained with SQLite's ``EXPLAIN QUERY PLAN``: a plan step that scans a whole table or index
+instead of searching it fails the test.
+"""
+import asyncio
+import sqlite3
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.database.models import Contacts, User
+from src.repository import contacts as repository_contacts
+from src.repository import users as repository_users
+from src.schemas import ContactBatchOperation, ContactUpdate
+
+READS = ("SELECT", "UPDATE", "DELETE")
+
+
+async def run_repository_queries(db: AsyncSession) -> None:
+    user = User(username="plans", email="plans@example.com", password="x", confirmed=True)
+    db.add(user)
+    await db.commit()
+    db.add_all([Contacts(name=f"Name{index}", surname="Franko", email=f"c{index}@example.com", phone_number="0",
+                         birthday=date(1990, 1 + index % 12, 1 + index % 28), user_id=user.id) for index in range(20)])
+    await db.commit()
+
+    for order_by in ("id", "name", "surname"):
+        page = await repository_contacts.get_contacts(0, 5, user, db, order_by=order_by)
+        after = repository_contacts.decode_cursor(repository_contacts.encode_cursor(order_by, page[-1]), order_by)
+        await repository_contacts.get_contacts(0, 5, user, db, order_by=order_by, after=after)
+    async for _ in repository_contacts.stream_contacts(user, db, batch_size=10):
+        pass
+    await repository_contacts.get_contact(page[0].id, user, db)
+    await repository_contacts.filter_contacts("Name1", "Fra", "example", user, db)
+    await repository_contacts.search_contacts("name fra", 10, user, db)
+    await repository_contacts.get_birthday_contacts(user, db, days=30, today=date(2026, 3, 10))
+    await repository_contacts.get_birthday_contacts(user, db, days=30, today=date(2026, 12, 20))
+    await repository_contacts.update_contact(page[0].id, ContactUpdate(phone_number="1"), user, db)
+    await repository_contacts.remove_contact(page[1].id, user, db)
+    await repository_contacts.batch_contacts([
+        ContactBatchOperation(op="get", id=page[2].id),
+        ContactBatchOperation(op="update", id=page[3].id, body=ContactUpdate(phone_number="2")),
+        ContactBatchOperation(op="delete", id=page[4].id),
+    ], user, db)
+    db_user = await repository_users.get_user_by_email(user.email, db)
+    await repository_users.update_password(db_user, "hash", db)
+
+
+@pytest.fixture(scope="module")
+def repository_statements(migrated_database):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{migrated_database}", poolclass=NullPool)
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(READS):
+            statements.append((statement, parameters))
+
+    async def run():
+        async with async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            await run_repository_queries(db)
+        await engine.dispose()
+
+    asyncio.run(run())
+    return statements
+
+
+def test_repository_queries_use_indexes(migrated_database, repository_statements):
+    assert len(repository_statements) >= 15
+    with sqlite3.connect(migrated_database) as conn:
+        for statement, parameters in repository_statements:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            scans = [step for step in plan if step.startswith("SCAN")]
+            assert not scans, f"{statement}\n{parameters}\n" + "\n".join(plan)
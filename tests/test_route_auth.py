@@ -1,16 +1,32 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock
+
+import pytest
+from fakeredis import FakeAsyncRedis
 
 from src.database.models import User
+from src.services.auth import auth_service
+from src.services.rate_limit import Policy, RateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    r = FakeAsyncRedis()
+    monkeypatch.setattr(auth_service.cache, "r", r)
+    monkeypatch.setattr(auth_service.tokens, "r", r)
+    monkeypatch.setattr(auth_service.sessions, "r", r)
+    return r
 
 
 def test_create_user(client, user, monkeypatch):
-    mock_send_email = MagicMock()
-    monkeypatch.setattr("src.routes.auth.send_email",  mock_send_email)
+    mock_enqueue = AsyncMock()
+    monkeypatch.setattr("src.routes.auth.job_queue.enqueue",  mock_enqueue)
     response = client.post("/api/auth/signup", json=user)
     assert response.status_code == 201, response.text
     data = response.json()
     assert data["user"]["email"] == user.get("email")
     assert "id" in data["user"]
+    mock_enqueue.assert_awaited_once_with("send_email", user.get("email"), user.get("username"),
+                                          "http://testserver/")
 
 def test_repeat_create_user(client, user):
     response = client.post("/api/auth/signup", json=user)
@@ -45,3 +61,86 @@ def test_login_wrong_email(client, user):
     assert response.status_code == 401, response.text
     data = response.json()
     assert data["detail"] == "Invalid email"
+
+
+def test_logout_revokes_access_token(client, user):
+    response = client.post("/api/auth/login", data={"username": user.get("email"), "password": user.get("password")})
+    assert response.status_code == 200, response.text
+    tokens = response.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    digest = auth_service.tokens.digest(tokens["access_token"])
+
+    response = client.get("/api/users/me/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert auth_service.tokens.get(digest)["sub"] == user.get("email")
+
+    response = client.post("/api/auth/logout", headers=headers)
+    assert response.status_code == 204, response.text
+    assert auth_service.tokens.get(digest) is None
+
+    response = client.get("/api/users/me/", headers=headers)
+    assert response.status_code == 401, response.text
+    response = client.get("/api/auth/refresh_token",
+                          headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 401, response.text
+
+
+def login(client, user):
+    response = client.post("/api/auth/login", data={"username": user.get("email"), "password": user.get("password")})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def refresh(client, refresh_token):
+    return client.get("/api/auth/refresh_token", headers={"Authorization": f"Bearer {refresh_token}"})
+
+
+def test_refresh_token_rotates(client, user, max_queries):
+    tokens = login(client, user)
+    with max_queries(0):
+        response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    response = refresh(client, rotated["refresh_token"])
+    assert response.status_code == 200, response.text
+
+
+def test_refresh_token_reuse_revokes_session(client, user):
+    tokens = login(client, user)
+    rotated = refresh(client, tokens["refresh_token"]).json()
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 401, response.text
+    response = refresh(client, rotated["refresh_token"])
+    assert response.status_code == 401, response.text
+
+
+def test_sessions_are_per_device(client, user):
+    phone = login(client, user)
+    laptop = login(client, user)
+
+    response = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {phone['access_token']}"})
+    assert response.status_code == 204, response.text
+
+    assert refresh(client, phone["refresh_token"]).status_code == 401
+    assert refresh(client, laptop["refresh_token"]).status_code == 200
+
+
+def test_login_rate_limited(client, user, monkeypatch):
+    limiter = RateLimiter(FakeAsyncRedis(), policies={"login": Policy(limit=2, window=60)}, local_size=16)
+    monkeypatch.setattr("src.services.rate_limit.rate_limiter", limiter)
+    data = {"username": user.get("email"), "password": "wrong_password"}
+
+    response = client.post("/api/auth/login", data=data)
+    assert response.status_code == 401, response.text
+    assert response.headers["RateLimit-Limit"] == "2"
+    assert response.headers["RateLimit-Remaining"] == "1"
+    assert response.headers["RateLimit-Policy"] == "2;w=60"
+    assert client.post("/api/auth/login", data=data).status_code == 401
+
+    response = client.post("/api/auth/login", data=data)
+    assert response.status_code == 429, response.text
+    assert response.headers["RateLimit-Remaining"] == "0"
+    assert 0 < int(response.headers["Retry-After"]) <= 60
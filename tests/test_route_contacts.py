@@ -0,0 +1,368 @@
+import base64
+import json
+from datetime import date
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from main import app
+from src.services.http_cache import contacts_cache
+from src.services.metrics import request_metrics
+
+
+@pytest.fixture(scope="module")
+def contacts(client, current_user):
+    created = []
+    for index, name in enumerate(["Olena", "Andrii", "Taras", "Bohdan", "Iryna"]):
+        response = client.post("/api/contacts/", json={
+            "name": name, "surname": "Shevchenko", "email": f"{name.lower()}@example.com",
+            "phone_number": f"+38050000000{index}", "birthday": None,
+        })
+        assert response.status_code == 200, response.text
+        created.append(response.json())
+    return created
+
+
+def read_all_pages(client, **params):
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, limit=2)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/contacts/", params=query)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pagination_by_id(client, contacts):
+    pages = read_all_pages(client)
+    ids = [contact["id"] for page in pages for contact in page]
+    assert ids == sorted(contact["id"] for contact in contacts)
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_cursor_pagination_by_name(client, contacts):
+    pages = read_all_pages(client, order_by="name")
+    names = [contact["name"] for page in pages for contact in page]
+    assert names == sorted(contact["name"] for contact in contacts)
+
+
+def test_cursor_pagination_by_surname(client, contacts):
+    pages = read_all_pages(client, order_by="surname")
+    keys = [(contact["surname"], contact["name"]) for page in pages for contact in page]
+    assert keys == sorted((contact["surname"], contact["name"]) for contact in contacts)
+
+
+def test_skip_limit_still_supported(client, contacts):
+    response = client.get("/api/contacts/", params={"skip": 1, "limit": 2})
+    assert response.status_code == 200, response.text
+    assert [contact["id"] for contact in response.json()] == [contact["id"] for contact in contacts[1:3]]
+
+
+def test_invalid_cursor(client, contacts):
+    response = client.get("/api/contacts/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400, response.text
+    cursor = client.get("/api/contacts/", params={"limit": 1}).headers["X-Next-Cursor"]
+    response = client.get("/api/contacts/", params={"cursor": cursor, "order_by": "name"})
+    assert response.status_code == 400, response.text
+    for order_by, *keys in (["id", "abc"], ["id", [1]], ["id", True], ["name", 1, 2], ["surname", None, "a"]):
+        raw = json.dumps([order_by, *keys]).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        response = client.get("/api/contacts/", params={"cursor": cursor, "order_by": order_by})
+        assert response.status_code == 400, response.text
+
+
+def test_response_headers_are_exposed_to_browsers(client, contacts):
+    response = client.get("/api/contacts/", params={"limit": 1}, headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 200, response.text
+    exposed = response.headers["Access-Control-Expose-Headers"]
+    assert "X-Next-Cursor" in exposed
+    assert "ETag" in exposed
+    assert "RateLimit-Remaining" in exposed
+    assert "Retry-After" in exposed
+
+
+def test_search_contacts(client, contacts):
+    response = client.get("/api/contacts/search", params={"q": "an"})
+    assert response.status_code == 200, response.text
+    names = [contact["name"] for contact in response.json()]
+    assert names[0] == "Andrii"
+    assert set(names) == {"Andrii", "Bohdan"}
+
+
+def test_search_contacts_all_words_must_match(client, contacts):
+    response = client.get("/api/contacts/search", params={"q": "tar shevch"})
+    assert response.status_code == 200, response.text
+    assert [contact["name"] for contact in response.json()] == ["Taras"]
+
+
+def test_search_contacts_escapes_wildcards(client, contacts):
+    response = client.get("/api/contacts/search", params={"q": "%"})
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+
+
+@pytest.fixture(scope="module")
+def birthday_contacts(client, current_user):
+    birthdays = {"Yurii": "1990-12-30", "Mykola": "1985-01-02", "Lesia": "2000-02-29", "Pylyp": "1970-07-01"}
+    for index, (name, birthday) in enumerate(birthdays.items()):
+        response = client.post("/api/contacts/", json={
+            "name": name, "surname": "Franko", "email": f"{name.lower()}@example.com",
+            "phone_number": f"+38067000000{index}", "birthday": birthday,
+        })
+        assert response.status_code == 200, response.text
+    return birthdays
+
+
+def freeze_today(monkeypatch, today: date):
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    monkeypatch.setattr("src.repository.contacts.date", FrozenDate)
+
+
+@pytest.mark.parametrize("today, days, expected", [
+    (date(2025, 12, 28), 7, ["Yurii", "Mykola"]),
+    (date(2025, 12, 31), 2, ["Mykola"]),
+    (date(2025, 12, 30), 0, ["Yurii"]),
+    (date(2025, 2, 26), 3, ["Lesia"]),
+    (date(2024, 2, 29), 7, ["Lesia"]),
+    (date(2025, 3, 1), 366, ["Pylyp", "Yurii", "Mykola", "Lesia"]),
+])
+def test_birthday_contacts(client, birthday_contacts, monkeypatch, today, days, expected):
+    freeze_today(monkeypatch, today)
+    response = client.get("/api/contacts/birthday", params={"days": days})
+    assert response.status_code == 200, response.text
+    assert [contact["name"] for contact in response.json()] == expected
+
+
+def test_import_contacts_csv(client, current_user, monkeypatch):
+    monkeypatch.setattr("src.routes.contacts.settings.contacts_import_batch_size", 2)
+    content = (
+        "name,surname,email,phone_number,birthday\n"
+        "Ivan,Kotliarevskyi,ivan.k@example.com,+380500000101,1769-09-09\n"
+        "Marko,Vovchok,marko.v@example.com,+380500000102,\n"
+        "Ivan,Franko,ivan.f@example.com,+380500000103,\n"
+        "Hryhorii,Skovoroda,not-an-email,+380500000104,\n"
+        "Olha,Kobylianska,marko.v@example.com,+380500000105,\n"
+    )
+    response = client.post("/api/contacts/import", files={"file": ("contacts.csv", content, "text/csv")})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["total"] == 5
+    assert data["imported"] == 2
+    assert [error["row"] for error in data["errors"]] == [3, 4, 5]
+    assert data["errors"][1]["detail"].startswith("email:")
+
+
+def test_import_contacts_jsonl(client, current_user):
+    content = (
+        '{"name": "Vasyl", "surname": "Stus", "email": "vasyl.s@example.com", "phone_number": "1", '
+        '"birthday": "1938-01-06"}\n'
+        '\n'
+        'not json\n'
+    )
+    response = client.post("/api/contacts/import", params={"format": "jsonl"},
+                           files={"file": ("contacts.txt", content, "application/octet-stream")})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["total"], data["imported"]) == (2, 1)
+    assert data["errors"][0]["row"] == 3
+    response = client.get("/api/contacts/search", params={"q": "Stus"})
+    assert response.json()[0]["birthday"] == "1938-01-06"
+
+
+def test_import_contacts_unreadable_file(client, current_user):
+    content = b"name,surname,email,phone_number,birthday\nTaras,Bulba,\xff\xfe@example.com,1,\n"
+    response = client.post("/api/contacts/import", files={"file": ("contacts.csv", content, "text/csv")})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["total"], data["imported"]) == (1, 0)
+    assert data["errors"][0]["row"] == 1
+    assert "Unreadable" in data["errors"][0]["detail"]
+
+    # A field over the csv module's size limit raises csv.Error.
+    content = f'name,surname,email,phone_number,birthday\nLesia,Ukrainka,"{"x" * 200_000}",1,\n'
+    response = client.post("/api/contacts/import", files={"file": ("contacts.csv", content, "text/csv")})
+    assert response.status_code == 200, response.text
+    assert "field limit" in response.json()["errors"][0]["detail"]
+
+
+def test_import_contacts_unknown_format(client, current_user):
+    response = client.post("/api/contacts/import", files={"file": ("contacts.xls", b"", "application/vnd.ms-excel")})
+    assert response.status_code == 400, response.text
+
+
+def test_export_contacts_csv(client, contacts):
+    response = client.get("/api/contacts/export")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,surname,email,phone_number,birthday"
+    assert f'{contacts[0]["id"]},Olena,Shevchenko,olena@example.com,+380500000000,' in lines
+
+
+def test_export_contacts_jsonl(client, contacts, birthday_contacts):
+    response = client.get("/api/contacts/export", params={"format": "jsonl"})
+    assert response.status_code == 200, response.text
+    records = [json.loads(line) for line in response.text.splitlines()]
+    ids = [record["id"] for record in records]
+    assert ids == sorted(ids)
+    assert {"name": "Lesia", "birthday": "2000-02-29"}.items() <= next(
+        record for record in records if record["name"] == "Lesia").items()
+
+
+def test_export_contacts_vcard(client, birthday_contacts):
+    response = client.get("/api/contacts/export", params={"format": "vcard"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-disposition"] == 'attachment; filename="contacts.vcf"'
+    assert "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Franko;Lesia;;;\r\nFN:Lesia Franko\r\n" in response.text
+    assert "BDAY:2000-02-29\r\nEND:VCARD\r\n" in response.text
+
+
+def test_patch_contact_updates_only_supplied_fields(client, contacts):
+    contact_id = contacts[1]["id"]
+    response = client.patch(f"/api/contacts/{contact_id}", json={"phone_number": "+380991112233",
+                                                                 "birthday": "1991-08-24"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["name"] == "Andrii"
+    assert data["phone_number"] == "+380991112233"
+    assert data["birthday"] == "1991-08-24"
+
+    response = client.put(f"/api/contacts/{contact_id}", json={"birthday": None})
+    assert response.status_code == 200, response.text
+    assert response.json()["birthday"] is None
+    assert response.json()["phone_number"] == "+380991112233"
+
+
+def test_update_and_remove_missing_contact(client, contacts):
+    assert client.patch("/api/contacts/999999", json={"name": "Nobody"}).status_code == 404
+    assert client.delete("/api/contacts/999999").status_code == 404
+
+
+def test_remove_contact(client, current_user):
+    response = client.post("/api/contacts/", json={"name": "Temp", "surname": "Contact", "email": "temp@example.com",
+                                                   "phone_number": "0", "birthday": None})
+    contact_id = response.json()["id"]
+    response = client.delete(f"/api/contacts/{contact_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == "temp@example.com"
+    assert client.get(f"/api/contacts/{contact_id}").status_code == 404
+
+
+def test_batch_contacts(client, current_user, max_queries):
+    ids = []
+    for index in range(4):
+        response = client.post("/api/contacts/", json={"name": f"Batch{index}", "surname": "Sync",
+                                                       "email": f"batch{index}@example.com", "phone_number": "0",
+                                                       "birthday": None})
+        ids.append(response.json()["id"])
+    operations = [
+        {"op": "get", "id": ids[0]},
+        {"op": "update", "id": ids[1], "body": {"phone_number": "+380501234567"}},
+        {"op": "update", "id": ids[2], "body": {"birthday": "1991-08-24"}},
+        {"op": "delete", "id": ids[3]},
+        {"op": "update", "id": 999999, "body": {"name": "Nobody"}},
+        {"op": "delete", "id": 999998},
+    ]
+
+    # One UPDATE per set of changed fields, one SELECT and one DELETE.
+    with max_queries(5):
+        response = client.post("/api/contacts/batch", json={"operations": operations})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [(result["op"], result["id"], result["status"]) for result in results] == \
+        [(operation["op"], operation["id"], status) for operation, status in zip(operations,
+                                                                                 [200, 200, 200, 200, 404, 404])]
+    assert results[0]["contact"]["name"] == "Batch0"
+    assert results[1]["contact"]["phone_number"] == "+380501234567"
+    assert results[2]["contact"]["birthday"] == "1991-08-24"
+    assert results[3]["contact"]["email"] == "batch3@example.com"
+    assert results[4]["contact"] is None and results[4]["detail"] == "Note not found"
+
+    assert client.get(f"/api/contacts/{ids[1]}").json()["phone_number"] == "+380501234567"
+    assert client.get(f"/api/contacts/{ids[3]}").status_code == 404
+
+
+def test_batch_contacts_conflict_changes_nothing(client, current_user):
+    ids = []
+    for index in range(2):
+        response = client.post("/api/contacts/", json={"name": f"Conflict{index}", "surname": "Sync",
+                                                       "email": f"conflict{index}@example.com", "phone_number": "0",
+                                                       "birthday": None})
+        ids.append(response.json()["id"])
+    response = client.post("/api/contacts/batch", json={"operations": [
+        {"op": "delete", "id": ids[0]},
+        {"op": "update", "id": ids[1], "body": {"email": "olena@example.com"}},
+    ]})
+    assert response.status_code == 409, response.text
+    assert client.get(f"/api/contacts/{ids[0]}").status_code == 200
+
+
+def test_batch_contacts_rejects_repeated_ids(client, current_user):
+    response = client.post("/api/contacts/batch", json={"operations": [{"op": "get", "id": 1},
+                                                                       {"op": "delete", "id": 1}]})
+    assert response.status_code == 422, response.text
+
+
+def test_request_metrics_count_queries(client, contacts):
+    route = ("GET", "/api/contacts/{contact_id}")
+    before = request_metrics.queries[route]
+    response = client.get(f"/api/contacts/{contacts[0]['id']}")
+    assert response.status_code == 200, response.text
+    assert request_metrics.queries[route] - before == 1
+
+
+def test_contacts_query_budget(client, contacts, max_queries):
+    contact_id = contacts[1]["id"]
+    with max_queries(1):
+        assert client.get("/api/contacts/", params={"limit": 2}).status_code == 200
+    with max_queries(1):
+        assert client.get(f"/api/contacts/{contact_id}").status_code == 200
+    with max_queries(1):
+        assert client.get("/api/contacts/search", params={"q": "shev"}).status_code == 200
+    with max_queries(1):
+        assert client.get("/api/contacts/birthday").status_code == 200
+    with max_queries(1):
+        assert client.patch(f"/api/contacts/{contact_id}", json={"phone_number": "+380509999999"}).status_code == 200
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    monkeypatch.setattr(contacts_cache, "r", FakeAsyncRedis())
+    return contacts_cache
+
+
+def test_contact_reads_revalidate_with_etag(client, contacts, response_cache, max_queries):
+    contact_id = contacts[2]["id"]
+    first = client.get(f"/api/contacts/{contact_id}")
+    assert first.status_code == 200, first.text
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    with max_queries(0):
+        cached = client.get(f"/api/contacts/{contact_id}")
+        not_modified = client.get(f"/api/contacts/{contact_id}", headers={"If-None-Match": etag})
+    assert cached.json() == first.json()
+    assert not_modified.status_code == 304
+
+    response = client.patch(f"/api/contacts/{contact_id}", json={"phone_number": "+380501111111"})
+    assert response.status_code == 200, response.text
+    changed = client.get(f"/api/contacts/{contact_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["phone_number"] == "+380501111111"
+    assert changed.headers["ETag"] != etag
+
+
+def test_contact_list_cache_keeps_cursor_header(client, contacts, response_cache):
+    first = client.get("/api/contacts/", params={"limit": 2})
+    cached = client.get("/api/contacts/", params={"limit": 2})
+    assert cached.json() == first.json()
+    assert cached.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
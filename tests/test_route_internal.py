@@ -0,0 +1,50 @@
+import pytest
+
+HEADERS = {"X-Internal-Token": "internal-secret"}
+
+
+@pytest.fixture(autouse=True)
+def internal_token(monkeypatch):
+    monkeypatch.setattr("src.routes.internal.settings.internal_token", "internal-secret")
+
+
+def test_requires_internal_token(client, monkeypatch):
+    assert client.get("/internal/db/pool").status_code == 401
+    assert client.get("/internal/db/pool", headers={"X-Internal-Token": "wrong"}).status_code == 401
+    monkeypatch.setattr("src.routes.internal.settings.internal_token", None)
+    assert client.get("/internal/db/pool", headers=HEADERS).status_code == 404
+
+
+def test_db_pool_stats(client):
+    response = client.get("/internal/db/pool", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["checked_out"] == 0
+    assert data["size"] == 5
+    assert data["wait_seconds"]["buckets"]["+Inf"] == data["wait_seconds"]["count"]
+
+
+def test_password_hashing_stats(client):
+    response = client.get("/internal/auth/hashing", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["in_flight"] == 0
+    assert data["latency_seconds"]["count"] == data["latency_seconds"]["buckets"]["+Inf"]
+
+
+def test_redis_pool_stats(client):
+    response = client.get("/internal/redis/pool", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["max_connections"] == 50
+    assert data["in_use"] == 0
+    assert data["wait_seconds"]["buckets"]["+Inf"] == data["wait_seconds"]["count"]
+
+
+def test_prometheus_metrics_count_queries(client):
+    client.get("/internal/db/pool", headers=HEADERS)
+    response = client.get("/internal/metrics", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/internal/db/pool",status="200"}' in response.text
+    assert "# TYPE http_request_db_queries_total counter" in response.text
@@ -0,0 +1,117 @@
+import hashlib
+import io
+from unittest.mock import AsyncMock
+
+import pytest
+
+from main import app
+from src.services.avatars import LocalAvatarStore, get_avatar_uploader
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+class StubUploader:
+    def __init__(self):
+        self.uploads = []
+
+    async def upload(self, data: bytes, public_id: str) -> str:
+        self.uploads.append((data, public_id))
+        return f"https://avatars.example.com/{public_id}.png"
+
+
+@pytest.fixture()
+def uploader():
+    stub = StubUploader()
+    app.dependency_overrides[get_avatar_uploader] = lambda: stub
+    yield stub
+    app.dependency_overrides.pop(get_avatar_uploader)
+
+
+def test_update_avatar(client, current_user, uploader):
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", PNG, "image/png")})
+    assert response.status_code == 200, response.text
+    assert response.json()["avatar"] == "https://avatars.example.com/ContactsApp/max123.png"
+    assert uploader.uploads == [(PNG, "ContactsApp/max123")]
+
+
+def test_update_avatar_rejects_non_image(client, current_user, uploader):
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", b"<svg></svg>", "image/png")})
+    assert response.status_code == 415, response.text
+    assert uploader.uploads == []
+
+
+def test_update_avatar_rejects_large_file(client, current_user, uploader, monkeypatch):
+    monkeypatch.setattr("src.services.avatars.settings.avatar_max_bytes", len(PNG) - 1)
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", PNG, "image/png")})
+    assert response.status_code == 413, response.text
+    assert uploader.uploads == []
+
+
+@pytest.fixture()
+def local_store(tmp_path):
+    pytest.importorskip("PIL")
+    store = LocalAvatarStore(tmp_path, [32, 64])
+    app.dependency_overrides[get_avatar_uploader] = lambda: store
+    yield store
+    app.dependency_overrides.pop(get_avatar_uploader)
+
+
+def make_png(color: str) -> bytes:
+    image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image.new("RGB", (120, 80), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_local_avatar_thumbnails(client, current_user, local_store):
+    Image = pytest.importorskip("PIL.Image")
+    image = make_png("red")
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", image, "image/png")})
+    assert response.status_code == 200, response.text
+    url = response.json()["avatar"]
+    digest = hashlib.sha256(image).hexdigest()
+    assert url == f"/api/users/avatars/{digest}/64"
+
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert Image.open(io.BytesIO(response.content)).size == (64, 64)
+    assert Image.open(local_store.path(digest, 32)).size == (32, 32)
+
+    response = client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_local_avatar_deduplicates_uploads(client, current_user, local_store, monkeypatch):
+    image = make_png("blue")
+    client.patch("/api/users/avatar", files={"file": ("avatar.png", image, "image/png")})
+    monkeypatch.setattr(local_store, "image", None)
+    response = client.patch("/api/users/avatar", files={"file": ("again.png", image, "image/png")})
+    assert response.status_code == 200, response.text
+
+
+def test_deferred_avatar_is_verified_before_enqueueing(client, current_user, tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    store = LocalAvatarStore(tmp_path, [32, 64], defer=True)
+    enqueue = AsyncMock()
+    monkeypatch.setattr("src.services.avatars.job_queue.enqueue", enqueue)
+    app.dependency_overrides[get_avatar_uploader] = lambda: store
+    try:
+        response = client.patch("/api/users/avatar", files={"file": ("avatar.png", PNG, "image/png")})
+        assert response.status_code == 415, response.text
+        enqueue.assert_not_awaited()
+
+        image = make_png("green")
+        response = client.patch("/api/users/avatar", files={"file": ("avatar.png", image, "image/png")})
+        assert response.status_code == 200, response.text
+        assert response.json()["avatar"] == store.url(hashlib.sha256(image).hexdigest())
+        enqueue.assert_awaited_once()
+    finally:
+        app.dependency_overrides.pop(get_avatar_uploader)
+
+
+def test_local_avatar_not_found(client, local_store):
+    assert client.get(f"/api/users/avatars/{'0' * 64}/64").status_code == 404
+    assert client.get(f"/api/users/avatars/{'0' * 64}/65").status_code == 404
+    assert client.get("/api/users/avatars/not-a-digest/64").status_code == 422